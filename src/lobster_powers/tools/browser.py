@@ -8,22 +8,374 @@ Examples:
     lp-browser snapshot
     lp-browser click "button[type=submit]"
     lp-browser screenshot
+    lp-browser batch steps.jsonl
+    lp-browser bench
     lp-browser stop
 """
 
 import argparse
-import asyncio
+import base64
 import json
+import math
 import os
-import signal
+import socket
 import sys
-import tempfile
+import time
 from pathlib import Path
+from urllib.parse import quote, unquote, urlsplit
+
+# asyncio and playwright are imported where the daemon needs them, so a
+# one-shot CLI call only pays for sockets and json.
 
 # State paths
 DATA_DIR = Path.home() / ".local" / "share" / "lobster-powers" / "browser"
 STATE_FILE = DATA_DIR / "state.json"
 SOCKET_PATH = DATA_DIR / "browser.sock"
+CAPTURE_DIR = DATA_DIR / "captures"  # screenshots/PDFs not returned inline
+PROFILES_DIR = DATA_DIR / "profiles"  # persistent user data dirs, one per profile
+
+BATCH_WINDOW = 32  # requests `batch` keeps in flight on one connection
+MAX_REQUEST_BYTES = 16 * 1024 * 1024  # one request line; a large crawl list fits
+MAX_CAPTURES = 50  # files kept in CAPTURE_DIR, oldest removed first
+MAX_CAPTURE_BYTES = 200 * 1024 * 1024
+DEFAULT_POOL_SIZE = 2  # pre-warmed contexts ready for new sessions
+DEFAULT_MAX_CONTEXTS = 8  # open contexts before the least recently used is closed
+DEFAULT_CACHE_MB = 256  # disk cache cap for a persistent profile
+
+# Resource governance
+DEFAULT_MAX_TABS = 20  # open tabs before the least recently used idle one is closed
+DEFAULT_IDLE_TIMEOUT = 1800  # seconds before an unused tab (not the current one) is closed
+DEFAULT_MAX_RSS_MB = 4096  # browser memory before it is relaunched
+GOVERN_INTERVAL = 15  # seconds between idle/memory checks
+RECYCLE_COOLDOWN = 300  # minimum seconds between memory relaunches
+RESTORE_TIMEOUT = 15  # seconds to reload each tab after a relaunch
+JS_HEAP_JS = "() => performance.memory ? performance.memory.usedJSHeapSize : null"
+
+# Actions that run against one tab, under that tab's lock
+TAB_ACTIONS = {"navigate", "wait", "snapshot", "screenshot", "click", "type", "select", "pdf"}
+
+# Crawling (pages fetched in parallel inside the daemon)
+CRAWL_EXTRACTS = ("text", "snapshot", "screenshot")
+DEFAULT_CRAWL_CONCURRENCY = 4  # pages loading at once
+DEFAULT_CRAWL_PER_HOST = 2  # of those, pages on the same host
+CRAWL_TIMEOUT = 30  # seconds per attempt
+CRAWL_RETRIES = 1  # extra attempts after an error, HTTP 429 or 5xx
+CRAWL_BACKOFF = 0.5  # seconds before the first retry, doubling after
+CRAWL_MAX_CHARS = 20000  # text kept per page
+
+# Actions that don't wait while the browser is being relaunched
+UNGATED_ACTIONS = {"status", "stop", "console", "network", "metrics"}
+
+# Actions answered with several responses, the last one marked "done"
+STREAM_ACTIONS = {"crawl"}
+
+# Per-action metrics
+METRICS_WINDOW = 1000  # recent samples per action kept for percentiles
+METRICS_INTERVAL = 15  # seconds between writes of --metrics-file
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+DAEMON_ACTIONS = {
+    "status", "open", "tabs", "contexts", "close_context", "block", "focus", "close",
+    "stop", "crawl", "metrics", "console", "network", "navigate", "wait", "snapshot",
+    "screenshot", "click", "type", "select", "pdf",
+}
+
+# Per-tab event capture; reads don't take the tab lock
+EVENT_STREAMS = ("console", "network")
+EVENT_BUFFER = 500  # events kept per tab and stream, oldest dropped first
+EVENT_TEXT_LIMIT = 2000  # characters kept of a console message or URL
+
+# Accessibility snapshots
+INTERACTIVE_ROLES = {
+    "button", "link", "textbox", "searchbox", "checkbox", "radio", "switch",
+    "combobox", "listbox", "option", "menuitem", "menuitemcheckbox",
+    "menuitemradio", "tab", "slider", "spinbutton", "treeitem",
+}
+SNAPSHOT_STATES = ("checked", "pressed", "expanded", "selected", "disabled", "required", "focused")
+
+# Captures
+IMAGE_FORMATS = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+
+# Navigation
+WAIT_STATES = ("commit", "domcontentloaded", "load", "networkidle")
+LOAD_STATES = WAIT_STATES[1:]  # what wait_for_load_state accepts
+NAV_TIMING_JS = """() => {
+    const nav = performance.getEntriesByType("navigation")[0];
+    if (!nav) return null;
+    const resources = performance.getEntriesByType("resource");
+    const ms = (v) => (v > 0 ? Math.round(v) : null);
+    return {
+        ttfb_ms: ms(nav.responseStart - nav.startTime),
+        dom_content_loaded_ms: ms(nav.domContentLoadedEventEnd - nav.startTime),
+        load_ms: ms(nav.loadEventEnd - nav.startTime),
+        transfer_bytes: resources.reduce((n, r) => n + (r.transferSize || 0), nav.transferSize || 0),
+        resources: resources.length,
+    };
+}"""
+
+# Request blocking (Playwright resource types and host suffixes)
+TRACKER_DOMAINS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "googlesyndication.com", "adservice.google.com", "facebook.net",
+    "hotjar.com", "segment.io", "scorecardresearch.com", "amplitude.com",
+]
+BLOCK_PRESETS = {
+    "no-media": {"types": ["image", "media", "font"], "domains": TRACKER_DOMAINS},
+    "text-only": {"types": ["image", "media", "font", "stylesheet"], "domains": TRACKER_DOMAINS},
+}
+
+
+def block_policy(spec) -> dict | None:
+    """Turn a request's "block" field into a policy, or None for no blocking.
+
+    `spec` is a preset name, "off", or {"preset", "types", "domains"}
+    where the lists extend the preset.
+    """
+    if not spec or spec == "off":
+        return None
+    if isinstance(spec, str):
+        spec = {"preset": spec}
+
+    types, domains = set(spec.get("types") or []), set(spec.get("domains") or [])
+    if spec.get("preset"):
+        if spec["preset"] not in BLOCK_PRESETS:
+            raise ValueError(f"Unknown block preset: {spec['preset']} (use {', '.join(BLOCK_PRESETS)})")
+        types.update(BLOCK_PRESETS[spec["preset"]]["types"])
+        domains.update(BLOCK_PRESETS[spec["preset"]]["domains"])
+    return {"types": types, "domains": domains} if types or domains else None
+
+
+def normalize_url(url: str) -> str:
+    """Default bare hosts to https."""
+    return url if url.startswith(("http://", "https://")) else "https://" + url
+
+
+def remaining_ms(deadline: float | None) -> float | None:
+    """Playwright timeout for what is left of a deadline (None: its default)."""
+    if deadline is None:
+        return None
+    return max((deadline - time.monotonic()) * 1000, 1)  # 0 would mean "no timeout"
+
+
+async def wait_ready(page, cmd: dict, deadline: float | None) -> None:
+    """Wait for a request's readiness conditions: a selector, then a JS function."""
+    if cmd.get("wait_for"):
+        await page.wait_for_selector(cmd["wait_for"], timeout=remaining_ms(deadline))
+    if cmd.get("wait_fn"):
+        await page.wait_for_function(cmd["wait_fn"], timeout=remaining_ms(deadline))
+
+
+async def load_page(page, url: str, cmd: dict) -> dict:
+    """Navigate a page using the request's wait options; return title, status and timings.
+
+    `timeout` (seconds) bounds the navigation and readiness waits together.
+    """
+    wait = cmd.get("wait") or "domcontentloaded"
+    if wait not in WAIT_STATES:
+        raise ValueError(f"wait must be one of {', '.join(WAIT_STATES)}")
+    deadline = time.monotonic() + cmd["timeout"] if cmd.get("timeout") else None
+
+    response = await page.goto(normalize_url(url), wait_until=wait, timeout=remaining_ms(deadline))
+    await wait_ready(page, cmd, deadline)
+
+    result = {"title": await page.title()}
+    if response:
+        result["http_status"] = response.status
+    result["timing"] = await page.evaluate(NAV_TIMING_JS)
+    return result
+
+
+async def take_screenshot(page, element, cmd: dict) -> bytes:
+    """Capture a page or element per the request's format/quality/clip/scale options.
+
+    Playwright only encodes PNG and JPEG, so WebP goes through the
+    DevTools Page.captureScreenshot command (Chromium only).
+    """
+    fmt = cmd.get("format") or "png"
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(IMAGE_FORMATS)}")
+    quality = cmd.get("quality") if fmt != "png" else None
+    scale = cmd.get("scale") or "device"
+
+    if fmt != "webp":
+        options = {"type": fmt, "scale": scale, "timeout": cmd["timeout"] * 1000 if cmd.get("timeout") else None}
+        if quality is not None:
+            options["quality"] = quality
+        if element is not None:
+            return await element.screenshot(**options)
+        return await page.screenshot(full_page=bool(cmd.get("full_page")), clip=cmd.get("clip"), **options)
+
+    clip = cmd.get("clip")
+    if element is not None:
+        clip = await element.bounding_box()
+        if clip is None:
+            raise LookupError("Element is not visible")
+    elif cmd.get("full_page"):
+        clip = await page.evaluate(
+            "() => ({x: 0, y: 0, width: document.documentElement.scrollWidth,"
+            " height: document.documentElement.scrollHeight})"
+        )
+    params = {"format": "webp", "captureBeyondViewport": bool(cmd.get("full_page"))}
+    if quality is not None:
+        params["quality"] = quality
+    if clip:
+        ratio = 1.0 if scale == "device" else 1 / await page.evaluate("window.devicePixelRatio")
+        params["clip"] = {**clip, "scale": ratio}
+
+    session = await page.context.new_cdp_session(page)
+    try:
+        shot = await session.send("Page.captureScreenshot", params)
+    finally:
+        await session.detach()
+    return base64.b64decode(shot["data"])
+
+
+def store_capture(data: bytes, suffix: str) -> Path:
+    """Write a capture into CAPTURE_DIR, evicting the oldest past the caps."""
+    CAPTURE_DIR.mkdir(parents=True, exist_ok=True)
+    path = CAPTURE_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{time.monotonic_ns() % 10**9:09d}{suffix}"
+    path.write_bytes(data)
+    prune_captures()
+    return path
+
+
+def prune_captures() -> None:
+    """Keep CAPTURE_DIR within MAX_CAPTURES files and MAX_CAPTURE_BYTES."""
+    if not CAPTURE_DIR.exists():
+        return
+    files = sorted(CAPTURE_DIR.iterdir(), key=lambda f: f.stat().st_mtime, reverse=True)
+    total = 0
+    for i, f in enumerate(files):
+        total += f.stat().st_size
+        if i >= MAX_CAPTURES or total > MAX_CAPTURE_BYTES:
+            f.unlink(missing_ok=True)
+
+
+def capture_result(data: bytes, mime: str, suffix: str, inline: bool) -> dict:
+    """Return capture bytes inline (base64) or as a path in CAPTURE_DIR."""
+    if inline:
+        return {"data": base64.b64encode(data).decode(), "mime": mime, "bytes": len(data)}
+    return {"path": str(store_capture(data, suffix)), "mime": mime, "bytes": len(data)}
+
+
+def process_tree_rss(pid: int) -> int:
+    """Memory of a process's descendants, in bytes (0 without /proc).
+
+    Uses PSS, which splits shared pages between the processes mapping
+    them; Chromium's processes share a lot, so summed RSS would count it
+    many times over. Falls back to RSS where smaps_rollup is missing.
+    """
+    children = {}
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            ppid = int(stat.read_text().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue  # Exited while we looked
+        children.setdefault(ppid, []).append(int(stat.parent.name))
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total, stack = 0, list(children.get(pid, []))
+    while stack:
+        child = stack.pop()
+        stack.extend(children.get(child, []))
+        try:
+            rollup = Path(f"/proc/{child}/smaps_rollup").read_text()
+            total += next(int(line.split()[1]) for line in rollup.splitlines() if line.startswith("Pss:")) * 1024
+            continue
+        except (OSError, IndexError, ValueError, StopIteration):
+            pass
+        try:
+            total += int(Path(f"/proc/{child}/statm").read_text().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            pass
+    return total
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a sorted list."""
+    return values[max(math.ceil(pct / 100 * len(values)) - 1, 0)]
+
+
+def summarize_metrics(metrics: dict) -> dict:
+    """Counts and p50/p95/p99 latency and queue wait per action."""
+    summary = {}
+    for action, entry in sorted(metrics.items()):
+        latency, queue = sorted(entry["latency"]), sorted(entry["queue"])
+        summary[action] = {
+            "count": entry["count"],
+            "errors": entry["errors"],
+            "mean_ms": round(entry["total_ms"] / entry["count"], 2),
+            **{f"p{p}_ms": round(percentile(latency, p), 2) for p in (50, 95, 99)},
+            **{f"queue_p{p}_ms": round(percentile(queue, p), 2) for p in (50, 95, 99)},
+        }
+    return summary
+
+
+def prometheus_text(metrics: dict, gauges: dict) -> str:
+    """Render metrics in the Prometheus text exposition format."""
+    lines = [
+        "# HELP lp_browser_action_duration_seconds Time to answer a request, by action.",
+        "# TYPE lp_browser_action_duration_seconds histogram",
+    ]
+    for action, entry in sorted(metrics.items()):
+        cumulative = 0
+        for le, n in zip([*LATENCY_BUCKETS_MS, None], entry["buckets"]):
+            cumulative += n
+            bound = "+Inf" if le is None else f"{le / 1000:g}"
+            lines.append(f'lp_browser_action_duration_seconds_bucket{{action="{action}",le="{bound}"}} {cumulative}')
+        lines.append(f'lp_browser_action_duration_seconds_sum{{action="{action}"}} {entry["total_ms"] / 1000:.6f}')
+        lines.append(f'lp_browser_action_duration_seconds_count{{action="{action}"}} {entry["count"]}')
+
+    lines += [
+        "# HELP lp_browser_action_errors_total Requests answered with an error, by action.",
+        "# TYPE lp_browser_action_errors_total counter",
+    ]
+    lines += [f'lp_browser_action_errors_total{{action="{a}"}} {e["errors"]}' for a, e in sorted(metrics.items())]
+
+    lines += [
+        "# HELP lp_browser_action_queue_seconds Wait before a request started running, recent requests.",
+        "# TYPE lp_browser_action_queue_seconds summary",
+    ]
+    for action, entry in sorted(metrics.items()):
+        queue = sorted(entry["queue"])
+        for q in (0.5, 0.95, 0.99):
+            lines.append(
+                f'lp_browser_action_queue_seconds{{action="{action}",quantile="{q}"}} {percentile(queue, q * 100) / 1000:.6f}'
+            )
+
+    for name, (kind, help_text, value) in gauges.items():
+        lines += [f"# HELP lp_browser_{name} {help_text}", f"# TYPE lp_browser_{name} {kind}"]
+        if isinstance(value, dict):
+            lines += [f'lp_browser_{name}{{reason="{k}"}} {v}' for k, v in sorted(value.items())]
+        else:
+            lines.append(f"lp_browser_{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def har_file(base: Path, context: str) -> Path:
+    """HAR file of a context: `base` for default, `base` with .<context> inserted for the rest."""
+    if context == "default":
+        return base
+    return base.with_name(f"{base.stem}.{quote(context, safe='')}{base.suffix}")
+
+
+def profile_dir(name: str) -> Path:
+    """Return the directory of a named profile."""
+    if not name or name.startswith(".") or "/" in name:
+        raise ValueError(f"Invalid profile name: {name!r}")
+    return PROFILES_DIR / name
+
+
+def dir_size(path: Path) -> int:
+    """Total size of the files under path, in bytes."""
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def is_blocked(policy: dict, resource_type: str, url: str) -> bool:
+    """Check a request against a blocking policy."""
+    if resource_type in policy["types"]:
+        return True
+    host = urlsplit(url).hostname or ""
+    return any(host == d or host.endswith("." + d) for d in policy["domains"])
 
 
 def load_state() -> dict | None:
@@ -48,249 +400,1285 @@ def clear_state() -> None:
     SOCKET_PATH.unlink(missing_ok=True)
 
 
-def is_daemon_running() -> bool:
-    """Check if daemon is running."""
-    state = load_state()
-    if not state:
-        return False
-    pid = state.get("pid")
-    if not pid:
-        return False
+def connect() -> socket.socket | None:
+    """Connect to the daemon socket, or return None if nothing is listening."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
     try:
-        os.kill(pid, 0)
-        return True
-    except OSError:
-        clear_state()
-        return False
+        sock.connect(str(SOCKET_PATH))
+        return sock
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
 
 
-async def send_command(command: dict) -> dict:
-    """Send command to daemon via socket."""
-    reader, writer = await asyncio.open_unix_connection(str(SOCKET_PATH))
-    writer.write(json.dumps(command).encode() + b"\n")
-    await writer.drain()
-    response = await reader.readline()
-    writer.close()
-    await writer.wait_closed()
-    return json.loads(response.decode())
+def is_daemon_running() -> bool:
+    """Check if daemon is running by connecting to its socket."""
+    sock = connect()
+    if sock is None:
+        if STATE_FILE.exists():
+            clear_state()  # Left behind by a daemon that died
+        return False
+    sock.close()
+    return True
+
+
+def read_response(stream) -> dict:
+    """Read one response line, failing if the daemon hung up."""
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("Browser daemon closed the connection")
+    return json.loads(line)
+
+
+def send_command(command: dict) -> dict:
+    """Send command to daemon via socket.
+
+    Plain blocking I/O: a one-shot command doesn't need an event loop.
+    """
+    sock = connect()
+    if sock is None:
+        raise ConnectionError("Browser daemon not running")
+    with sock, sock.makefile("rb") as stream:
+        sock.sendall(json.dumps(command).encode() + b"\n")
+        return read_response(stream)
+
+
+def send_batch(commands: list[dict], window: int = BATCH_WINDOW):
+    """Send many commands over one connection, yielding (command, response, rtt_ms).
+
+    Requests are tagged with their index as id and pipelined with up to
+    `window` in flight, so neither side blocks on a full socket buffer;
+    window=1 waits for each response before sending the next request.
+    Streaming actions answer more than once per id, so they are refused.
+    """
+    streamed = {c.get("action") for c in commands} & STREAM_ACTIONS
+    if streamed:
+        raise ValueError(f"{', '.join(sorted(streamed))} streams its results and can't run in a batch")
+    sock = connect()
+    if sock is None:
+        raise ConnectionError("Browser daemon not running")
+    sent = []
+    with sock, sock.makefile("rb") as stream:
+        for received in range(len(commands)):
+            while len(sent) < len(commands) and len(sent) - received < window:
+                i = len(sent)
+                sent.append(time.perf_counter())
+                sock.sendall(json.dumps({**commands[i], "id": i}).encode() + b"\n")
+            response = read_response(stream)
+            if "id" not in response:  # Rejected before its id could be read
+                raise ValueError(f"Daemon rejected a request: {response.get('error')}")
+            i = response["id"]
+            yield commands[i], response, (time.perf_counter() - sent[i]) * 1000
+
+
+def send_stream(command: dict):
+    """Send a streaming command, yielding its responses up to the one marked done."""
+    sock = connect()
+    if sock is None:
+        raise ConnectionError("Browser daemon not running")
+    with sock, sock.makefile("rb") as stream:
+        sock.sendall(json.dumps({"id": 0, **command}).encode() + b"\n")
+        while True:
+            response = read_response(stream)
+            if "id" not in response:  # Rejected before it was parsed: no more will come
+                response["done"] = True
+            yield response
+            if response.get("done"):
+                return
 
 
 # Daemon implementation
 
-async def run_daemon(headless: bool = False):
-    """Run browser daemon."""
+
+async def run_daemon(
+    headless: bool = False,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    max_contexts: int = DEFAULT_MAX_CONTEXTS,
+    block: dict | None = None,
+    profile: str | None = None,
+    cache_mb: int = DEFAULT_CACHE_MB,
+    max_tabs: int = DEFAULT_MAX_TABS,
+    idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    max_rss_mb: int = DEFAULT_MAX_RSS_MB,
+    metrics_file: str | None = None,
+    record_har: str | None = None,
+    replay_har: str | None = None,
+    har_missing: str = "abort",
+):
+    """Run browser daemon.
+
+    Tabs live in named browser contexts (isolated cookies and storage)
+    that share one browser process. Contexts are created on demand from a
+    pool of `pool_size` pre-warmed context+page pairs; beyond
+    `max_contexts`, the least recently used idle one is closed.
+
+    `block` is the request-blocking policy new contexts start with. A
+    context's policy can be changed later, and open/navigate can apply
+    one to a single tab; both are enforced with route handlers, which are
+    only installed while a policy is set.
+
+    With a `profile`, the default context is a persistent one kept in
+    PROFILES_DIR/<profile>, so the HTTP cache (capped at `cache_mb`),
+    service workers and logins survive restarts. A persistent context has
+    no browser of its own, so named contexts then come from a second
+    browser launched on first use; their cookies and storage are saved to
+    the profile when they close and restored when they are next opened.
+
+    The daemon looks after itself: past `max_tabs` the least recently used
+    idle tab is closed, tabs unused for `idle_timeout` seconds are closed,
+    and when the browser's processes exceed `max_rss_mb` (or it crashes)
+    it is relaunched with its contexts' cookies and storage and its tabs'
+    URLs restored under the same tab ids.
+
+    Every request is timed per action (latency and the wait before it
+    started running) for the `metrics` action, and, with `metrics_file`,
+    written there in Prometheus text format every METRICS_INTERVAL seconds.
+
+    `record_har` records each context's traffic to a HAR file (see
+    har_file), written when the context closes; `replay_har` answers
+    requests from such files, and `har_missing` decides what happens to
+    requests they don't contain ("abort" keeps the run offline).
+    """
+    import asyncio
+    import signal
+    from collections import Counter, defaultdict, deque
+    from contextlib import AsyncExitStack, asynccontextmanager, suppress
+
     from playwright.async_api import async_playwright
 
     DATA_DIR.mkdir(parents=True, exist_ok=True)
+    prune_captures()
+    if record_har:
+        # Each context records from its creation under its own name, so no
+        # anonymous pre-warmed contexts, and no relaunch overwriting a file
+        pool_size = 0
+        max_rss_mb = 0
 
     # Start browser
+    launch_args = ["--disable-blink-features=AutomationControlled"]
     pw = await async_playwright().start()
-    browser = await pw.chromium.launch(
-        headless=headless,
-        args=["--disable-blink-features=AutomationControlled"],
-    )
-    context = await browser.new_context()
-    pages = {}  # tab_id -> page
+    launching = None  # task launching the browser named contexts come from
+    persistent = None
+    healing = False  # set while the browser is closed on purpose
+
+    async def launch_browser():
+        new = await pw.chromium.launch(headless=headless, args=launch_args)
+        new.on("disconnected", lambda _: browser_lost())
+        return new
+
+    def har_options(name: str | None) -> dict:
+        if not record_har:
+            return {}
+        return {"record_har_path": str(har_file(Path(record_har), name or "default"))}
+
+    def has_own_har(name: str) -> bool:
+        # Whether a context must be created for `name` rather than taken from the pool
+        return bool(record_har) or bool(replay_har and har_file(Path(replay_har), name).exists())
+
+    async def replay_from_har(context, name: str | None) -> None:
+        if replay_har:
+            path = har_file(Path(replay_har), name or "default")
+            if not path.exists():
+                path = Path(replay_har)  # Contexts without their own file share the main one
+            await context.route_from_har(str(path), not_found=har_missing)
+
+    async def launch_persistent():
+        new = await pw.chromium.launch_persistent_context(
+            str(profile_dir(profile) / "user-data"),
+            headless=headless,
+            args=[*launch_args, f"--disk-cache-size={cache_mb * 1024 * 1024}"],
+            **har_options("default"),
+        )
+        await replay_from_har(new, "default")
+        new.on("close", lambda _: browser_lost())
+        return new
+
+    if profile:
+        saved_dir = profile_dir(profile) / "contexts"
+        saved_dir.mkdir(parents=True, exist_ok=True)
+        persistent = await launch_persistent()
+    else:
+        launching = asyncio.ensure_future(launch_browser())
+
+    async def get_browser():
+        nonlocal launching
+        if launching is None:
+            launching = asyncio.ensure_future(launch_browser())
+        return await launching
+
+    def saved_state(name: str) -> Path | None:
+        # Where a named context's cookies and storage persist, if anywhere
+        if not profile or name == "default":
+            return None
+        return saved_dir / f"{quote(name, safe='')}.json"
+
+    async def set_blocking(target, blocking: dict, policy: dict | None) -> None:
+        # target is a context or a page; blocked requests count against `blocking`
+        if policy and not blocking["handler"]:
+            async def handler(route):
+                request = route.request
+                if blocking["policy"] and is_blocked(blocking["policy"], request.resource_type, request.url):
+                    blocking["counts"][request.resource_type] += 1
+                    await route.abort("blockedbyclient")
+                else:
+                    await route.fallback()
+            blocking["handler"] = handler
+            await target.route("**/*", handler)
+        elif not policy and blocking["handler"]:
+            await target.unroute("**/*", blocking["handler"])
+            blocking["handler"] = None
+        blocking["policy"] = policy
+
+    async def track_context(new) -> dict:
+        blocking = {"policy": None, "handler": None, "counts": Counter()}
+        await set_blocking(new, blocking, block)
+        return {"context": new, "used": time.monotonic(), "blocking": blocking}
+
+    async def create_context(storage_state: Path | dict | None = None, name: str | None = None):
+        browser = await get_browser()
+        if isinstance(storage_state, Path):
+            storage_state = str(storage_state)
+        new = await browser.new_context(storage_state=storage_state, **har_options(name))
+        await replay_from_har(new, name)  # Before blocking, so blocking's route runs first
+        return new
+
+    async def new_context(storage_state: Path | dict | None = None, name: str | None = None) -> dict:
+        return await track_context(await create_context(storage_state, name))
+
+    contexts = {"default": await track_context(persistent) if persistent else await new_context(name="default")}
+    contexts_lock = asyncio.Lock()  # held while a context is created or torn down
+    spare = []  # pre-warmed (context entry, page) pairs
+    filling = None  # task topping up `spare`
+    tabs = {}  # tab_id -> {"page", "lock", "context", "blocking"}
     tab_counter = 0
 
-    # Create initial page
-    page = await context.new_page()
-    tab_counter += 1
-    pages[f"tab_{tab_counter}"] = page
-    current_tab = f"tab_{tab_counter}"
+    def add_tab(page, context_name: str = "default") -> str:
+        nonlocal tab_counter
+        tab_counter += 1
+        tab_id = f"tab_{tab_counter}"
+        now = time.monotonic()
+        tabs[tab_id] = {
+            "page": page,
+            "lock": asyncio.Lock(),
+            "context": context_name,
+            "created": now,
+            "used": now,
+            "refs": {},  # snapshot node path -> stable ref
+            "targets": {},  # ref -> (root selector, role, name, nth) for click/type
+            "last_snapshot": None,  # {"options", "lines"} for --diff
+            # Per-call policy; counts go to the context's totals
+            "blocking": {"policy": None, "handler": None, "counts": contexts[context_name]["blocking"]["counts"]},
+            "events": {stream: deque(maxlen=EVENT_BUFFER) for stream in EVENT_STREAMS},
+            "seq": dict.fromkeys(EVENT_STREAMS, 0),  # last sequence number per stream
+        }
+        watch_page(page, tabs[tab_id])
+        return tab_id
+
+    def watch_page(page, tab: dict) -> None:
+        def record(stream: str, event: dict) -> None:
+            tab["seq"][stream] += 1
+            tab["events"][stream].append({"seq": tab["seq"][stream], "time": round(time.time(), 3), **event})
+
+        def on_console(msg) -> None:
+            location = msg.location or {}
+            record("console", {
+                "type": msg.type,
+                "text": msg.text[:EVENT_TEXT_LIMIT],
+                "url": (location.get("url") or "")[:EVENT_TEXT_LIMIT],
+                "line": location.get("lineNumber"),
+            })
+
+        def on_pageerror(error) -> None:
+            record("console", {"type": "pageerror", "text": str(getattr(error, "message", error))[:EVENT_TEXT_LIMIT]})
+
+        async def on_finished(request) -> None:
+            try:
+                response = await request.response()
+            except Exception:  # Page closed meanwhile
+                response = None
+            record("network", {
+                "method": request.method,
+                "url": request.url[:EVENT_TEXT_LIMIT],
+                "resource_type": request.resource_type,
+                "status": response.status if response else None,
+                "duration_ms": round(request.timing.get("responseEnd", -1), 1),
+            })
+
+        def on_failed(request) -> None:
+            record("network", {
+                "method": request.method,
+                "url": request.url[:EVENT_TEXT_LIMIT],
+                "resource_type": request.resource_type,
+                "status": None,
+                "failure": request.failure,
+            })
+
+        def on_new_document(_page) -> None:
+            # Refs name nodes of the old document; drop them so they don't pile up
+            tab.update(refs={}, targets={}, last_snapshot=None)
+
+        page.on("domcontentloaded", on_new_document)
+        page.on("console", on_console)
+        page.on("pageerror", on_pageerror)
+        page.on("requestfinished", on_finished)
+        page.on("requestfailed", on_failed)
+
+    # Create initial page (a persistent context opens with one)
+    default = contexts["default"]["context"]
+    current_tab = add_tab(default.pages[0] if default.pages else await default.new_page())
+
+    async def fill_pool() -> None:
+        while len(spare) < pool_size:
+            entry = await new_context()
+            spare.append((entry, await entry["context"].new_page()))
+
+    def refill_pool() -> None:
+        nonlocal filling
+        if filling is None or filling.done():
+            filling = asyncio.create_task(fill_pool())
+
+    async def close_context(name: str, save: bool = True) -> None:
+        nonlocal current_tab
+        async with AsyncExitStack() as held:
+            # Let actions in flight on its tabs finish; queued ones then find the tab closed
+            for tab in [tab for tab in tabs.values() if tab["context"] == name]:
+                await held.enter_async_context(tab["lock"])
+            entry = contexts.pop(name)
+            for tab_id in [t for t, tab in tabs.items() if tab["context"] == name]:
+                del tabs[tab_id]
+            if current_tab not in tabs:
+                current_tab = next(iter(tabs), None)
+            path = saved_state(name)
+            if path and save:
+                await entry["context"].storage_state(path=str(path))
+            elif path:
+                path.unlink(missing_ok=True)
+            await entry["context"].close()
+
+    async def get_context(name: str):
+        """Return (context entry, ready page or None), creating the context if needed."""
+        if name in contexts:
+            contexts[name]["used"] = time.monotonic()
+            return contexts[name], None
+
+        async with contexts_lock:
+            if name in contexts:  # Created while we waited
+                return contexts[name], None
+
+            if len(contexts) >= max_contexts:
+                # Close the least recently used context with no action in flight
+                idle = [
+                    n for n in contexts
+                    if n != "default" and not any(
+                        tab["lock"].locked() for tab in tabs.values() if tab["context"] == n
+                    )
+                ]
+                if not idle:
+                    raise RuntimeError(f"All {max_contexts} contexts are busy")
+                await close_context(min(idle, key=lambda n: contexts[n]["used"]))
+
+            path = saved_state(name)
+            restore = path if path and path.exists() else None
+            if restore or has_own_har(name):
+                # A saved session or a HAR file needs a context created with it
+                entry, page = await new_context(restore, name), None
+            elif spare:
+                entry, page = spare.pop()
+                entry["used"] = time.monotonic()
+            else:
+                entry, page = await new_context(name=name), None
+            refill_pool()
+            contexts[name] = entry
+            return entry, page
+
+    if not profile:
+        refill_pool()  # With a profile, the second browser starts on first use
 
     # Save state
-    save_state({"pid": os.getpid(), "socket": str(SOCKET_PATH)})
+    save_state({"pid": os.getpid(), "socket": str(SOCKET_PATH), "profile": profile})
+
+    async def drop_tab(tab_id: str) -> None:
+        nonlocal current_tab
+        tab = tabs.pop(tab_id)
+        if current_tab == tab_id:
+            current_tab = next(iter(tabs), None)
+        await tab["page"].close()
+
+    async def make_room() -> None:
+        # Close least recently used idle tabs until a new one fits under max_tabs
+        while len(tabs) >= max_tabs:
+            idle = [t for t, tab in tabs.items() if t != current_tab and not tab["lock"].locked()]
+            if not idle:
+                raise RuntimeError(f"All {max_tabs} tabs are busy")
+            await drop_tab(min(idle, key=lambda t: tabs[t]["used"]))
+
+    metrics = {}  # action -> counts, latency buckets and recent samples
+    metrics_since = time.time()
+
+    def record_metric(action: str, elapsed_ms: float, queued_ms: float, error: bool) -> None:
+        # Add one request to the per-action metrics
+        entry = metrics.get(action)
+        if entry is None:
+            entry = metrics[action] = {
+                "count": 0,
+                "errors": 0,
+                "total_ms": 0.0,
+                "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),  # last one is +Inf
+                "latency": deque(maxlen=METRICS_WINDOW),
+                "queue": deque(maxlen=METRICS_WINDOW),
+            }
+        entry["count"] += 1
+        entry["errors"] += error
+        entry["total_ms"] += elapsed_ms
+        entry["buckets"][next((i for i, le in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= le), -1)] += 1
+        entry["latency"].append(elapsed_ms)
+        entry["queue"].append(queued_ms)
+
+    def write_metrics() -> None:
+        gauges = {
+            "tabs": ("gauge", "Open tabs.", len(tabs)),
+            "contexts": ("gauge", "Open browser contexts.", len(contexts)),
+            "rss_bytes": ("gauge", "Memory (PSS) of the browser processes.", process_tree_rss(os.getpid())),
+            "relaunches_total": ("counter", "Browser relaunches, by reason.", dict(relaunches)),
+        }
+        path = Path(metrics_file)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(prometheus_text(metrics, gauges))
+        tmp.replace(path)  # Scrapers never see a half-written file
+
+    async def export_metrics() -> None:
+        while True:
+            await asyncio.sleep(METRICS_INTERVAL)
+            try:
+                write_metrics()
+            except OSError as e:
+                print(f"Can't write metrics: {e}", file=sys.stderr, flush=True)
+
+    ready = asyncio.Event()  # cleared while the browser is relaunched
+    ready.set()
+    drained = asyncio.Event()  # set when no gated action is running
+    drained.set()
+    in_flight = 0
+    relaunches = Counter()
+    background = set()  # heal tasks, referenced until done
+
+    def browser_lost() -> None:
+        if not healing and not stop.is_set():
+            task = asyncio.create_task(heal("crash"))
+            background.add(task)
+            task.add_done_callback(background.discard)
+
+    async def restore_tab(page, url: str) -> None:
+        if url and url != "about:blank":
+            with suppress(Exception):
+                await page.goto(url, timeout=RESTORE_TIMEOUT * 1000)
+
+    async def heal(reason: str) -> None:
+        """Relaunch the browser, keeping contexts' storage and tabs' ids and URLs."""
+        nonlocal healing, launching, persistent
+        if healing:
+            return
+        healing = True
+        ready.clear()
+        try:
+            if reason != "crash":
+                await drained.wait()  # Let running actions finish first
+
+            # Save what can still be read; after a crash, sessions are lost
+            # unless a profile keeps them on disk
+            states = {}
+            for name, entry in contexts.items():
+                if entry["context"] is not persistent:
+                    try:
+                        states[name] = await asyncio.wait_for(entry["context"].storage_state(), 10)
+                    except Exception:
+                        path = saved_state(name)
+                        states[name] = path if path and path.exists() else None
+            urls = {tab_id: tab["page"].url for tab_id, tab in tabs.items()}
+
+            if filling:
+                filling.cancel()
+            spare.clear()
+            if persistent:
+                with suppress(Exception):
+                    await persistent.close()
+                persistent = await launch_persistent()
+            if launching:
+                with suppress(Exception):
+                    await (await launching).close()
+                launching = None
+
+            for name, entry in contexts.items():
+                if name == "default" and profile:
+                    new = persistent
+                else:
+                    new = await create_context(states.get(name), name)
+                entry["context"] = new
+                entry["blocking"]["handler"] = None
+                await set_blocking(new, entry["blocking"], entry["blocking"]["policy"])
+
+            blank = list(persistent.pages) if persistent else []  # A persistent context opens with one
+            for tab in tabs.values():
+                context = contexts[tab["context"]]["context"]
+                page = blank.pop() if context is persistent and blank else await context.new_page()
+                tab.update(page=page, refs={}, targets={}, last_snapshot=None)
+                watch_page(page, tab)
+                tab["blocking"]["handler"] = None
+                await set_blocking(page, tab["blocking"], tab["blocking"]["policy"])
+            await asyncio.gather(*(restore_tab(tab["page"], urls[tab_id]) for tab_id, tab in tabs.items()))
+
+            if not profile:
+                refill_pool()
+            relaunches[reason] += 1
+            print(f"Browser relaunched ({reason}), {len(tabs)} tabs restored", flush=True)
+        except Exception as e:
+            print(f"Browser relaunch failed: {e}", file=sys.stderr, flush=True)
+            stop.set()  # Better gone than a daemon with no browser
+        finally:
+            healing = False
+            ready.set()
+
+    async def govern() -> None:
+        # Close idle tabs and relaunch a browser that has grown too big
+        last_recycle = None
+        while True:
+            await asyncio.sleep(GOVERN_INTERVAL)
+            if healing:
+                continue
+            try:
+                now = time.monotonic()
+                if idle_timeout:
+                    for tab_id in [
+                        t for t, tab in tabs.items()
+                        if t != current_tab and not tab["lock"].locked() and now - tab["used"] > idle_timeout
+                    ]:
+                        # An earlier close yielded; the tab may be gone or in use by now
+                        tab = tabs.get(tab_id)
+                        if tab and tab_id != current_tab and not tab["lock"].locked():
+                            await drop_tab(tab_id)
+                if max_rss_mb and (last_recycle is None or now - last_recycle > RECYCLE_COOLDOWN):
+                    rss = process_tree_rss(os.getpid())
+                    if rss > max_rss_mb * 1024 * 1024:
+                        last_recycle = now
+                        print(f"Browser uses {rss // 1024 // 1024} MB (limit {max_rss_mb} MB)", flush=True)
+                        await heal("memory")
+            except Exception as e:
+                print(f"Tab governor error: {e}", file=sys.stderr, flush=True)
+
+    async def crawl(cmd: dict, emit) -> dict:
+        """Load many URLs on a pool of pages, emitting each result as it finishes."""
+        urls = cmd.get("urls") or []
+        if not urls:
+            raise ValueError("No URLs to crawl")
+        extract = cmd.get("extract") or ["text"]
+        if unknown := set(extract) - set(CRAWL_EXTRACTS):
+            raise ValueError(f"Unknown extract: {', '.join(sorted(unknown))} (use {', '.join(CRAWL_EXTRACTS)})")
+        if (cmd.get("wait") or "domcontentloaded") not in WAIT_STATES:
+            raise ValueError(f"wait must be one of {', '.join(WAIT_STATES)}")
+        concurrency = max(1, min(cmd.get("concurrency") or DEFAULT_CRAWL_CONCURRENCY, len(urls)))
+        per_host = max(1, cmd.get("per_host") or DEFAULT_CRAWL_PER_HOST)
+        retries = max(0, cmd["retries"] if cmd.get("retries") is not None else CRAWL_RETRIES)
+        max_chars = cmd.get("max_chars") or CRAWL_MAX_CHARS
+        page_cmd = {**cmd, "timeout": cmd.get("timeout") or CRAWL_TIMEOUT}
+        policy = block_policy(cmd.get("block"))
+
+        # A named context shares its logins; otherwise use a throwaway one
+        if cmd.get("context"):
+            entry, spare_page = await get_context(cmd["context"])
+        else:
+            entry, spare_page = await new_context(name="crawl"), None
+        context = entry["context"]
+        counts = Counter()
+
+        async def open_page(page=None):
+            page = page or await context.new_page()
+            await set_blocking(page, {"policy": None, "handler": None, "counts": counts}, policy)
+            return page
+
+        pages = asyncio.Queue()  # None marks a slot whose page the next visit opens
+        pages.put_nowait(await open_page(spare_page) if spare_page else None)
+        for _ in range(concurrency - 1):
+            pages.put_nowait(None)
+        hosts = defaultdict(lambda: asyncio.Semaphore(per_host))
+
+        async def extract_page(page) -> dict:
+            found = {}
+            if "text" in extract:
+                text = await page.inner_text("body")
+                found["text"] = text[:max_chars]
+                found["truncated"] = len(text) > max_chars
+            if "snapshot" in extract:
+                tree = await page.accessibility.snapshot()
+                rows = walk_snapshot(tree, {}, cmd.get("max_depth"), bool(cmd.get("interactive_only")))
+                found["snapshot"] = format_snapshot(rows)
+            if "screenshot" in extract:
+                data = await take_screenshot(page, None, page_cmd)
+                fmt = cmd.get("format") or "png"
+                found["screenshot"] = capture_result(data, IMAGE_FORMATS[fmt], f".{fmt}", bool(cmd.get("inline")))
+            return found
+
+        async def visit(index: int, url: str) -> dict:
+            started = time.perf_counter()
+            item = {"status": "ok", "index": index, "url": url}
+            async with hosts[urlsplit(normalize_url(url)).hostname]:
+                page = await pages.get()
+                entry["used"] = time.monotonic()  # Keep a named context from being evicted
+                try:
+                    for attempt in range(retries + 1):
+                        if attempt:
+                            await asyncio.sleep(CRAWL_BACKOFF * 2 ** (attempt - 1))
+                        try:
+                            page = page or await open_page()
+                            loaded = await load_page(page, url, page_cmd)
+                            status = loaded.get("http_status")
+                            if status and (status == 429 or status >= 500) and attempt < retries:
+                                continue
+                            item.update(loaded)
+                            item.update(await extract_page(page))
+                            item.pop("error", None)
+                            break
+                        except Exception as e:
+                            item["error"] = str(e).splitlines()[0] if str(e) else type(e).__name__
+                            if page:
+                                with suppress(Exception):
+                                    await page.close()
+                                page = None  # The next attempt starts on a clean page
+                    item["attempts"] = attempt + 1
+                finally:
+                    pages.put_nowait(page)  # None keeps the slot; its next visit reopens it
+            if "error" in item:
+                item["status"] = "error"
+            item["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            return item
+
+        tasks = [asyncio.create_task(visit(i, url)) for i, url in enumerate(urls)]
+        failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                failed += item["status"] == "error"
+                await emit(item)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if cmd.get("context"):
+                while not pages.empty():
+                    page = pages.get_nowait()
+                    if page:
+                        with suppress(Exception):
+                            await page.close()
+            else:
+                await context.close()
+        return {"pages": len(urls), "failed": failed, "blocked": dict(counts)}
+
+    @asynccontextmanager
+    async def use_tab(tab_id: str):
+        # Actions on one tab run one at a time; other tabs proceed in parallel
+        tab = tabs.get(tab_id)
+        if not tab:
+            raise LookupError(f"Tab not found: {tab_id}")
+        async with tab["lock"]:
+            if tabs.get(tab_id) is not tab:
+                raise LookupError(f"Tab closed: {tab_id}")
+            tab["used"] = contexts[tab["context"]]["used"] = time.monotonic()
+            yield tab
 
     # Handle commands
-    async def handle_client(reader, writer):
-        nonlocal current_tab, tab_counter, pages
-
+    async def dispatch(cmd: dict, emit=None) -> dict:
+        nonlocal in_flight
+        if cmd.get("action") in UNGATED_ACTIONS:
+            cmd["_admitted"] = time.perf_counter()
+            return await run_action(cmd, emit)
+        await ready.wait()  # Hold new work while the browser is relaunched
+        cmd["_admitted"] = time.perf_counter()
+        in_flight += 1
+        drained.clear()
         try:
-            data = await reader.readline()
-            if not data:
-                return
+            return await run_action(cmd, emit)
+        finally:
+            in_flight -= 1
+            if not in_flight:
+                drained.set()
 
-            cmd = json.loads(data.decode())
-            action = cmd.get("action")
-            result = {"status": "ok"}
+    async def tab_info(tab_id: str, tab: dict, now: float) -> dict:
+        try:
+            heap = await asyncio.wait_for(tab["page"].evaluate(JS_HEAP_JS), 1)
+        except Exception:
+            heap = None  # Busy or mid-relaunch
+        return {
+            "id": tab_id,
+            "context": tab["context"],
+            "url": tab["page"].url,
+            "age_s": round(now - tab["created"]),
+            "idle_s": round(now - tab["used"]),
+            "js_heap_mb": round(heap / 1024 / 1024, 1) if heap else None,
+        }
+
+    async def run_action(cmd: dict, emit=None) -> dict:
+        nonlocal current_tab, metrics_since
+
+        action = cmd.get("action")
+        tab_id = cmd.get("tab_id") or current_tab
+        result = {"status": "ok"}
 
-            try:
-                page = pages.get(current_tab)
-
-                if action == "status":
-                    result["tabs"] = list(pages.keys())
-                    result["current"] = current_tab
-                    result["url"] = page.url if page else None
-
-                elif action == "open":
-                    url = cmd.get("url")
-                    if not url.startswith(("http://", "https://")):
-                        url = "https://" + url
-                    tab_counter += 1
-                    new_tab = f"tab_{tab_counter}"
-                    new_page = await context.new_page()
-                    await new_page.goto(url, wait_until="domcontentloaded")
-                    pages[new_tab] = new_page
-                    current_tab = new_tab
+        try:
+            if action == "status":
+                result["tabs"] = list(tabs.keys())
+                result["current"] = current_tab
+                result["url"] = tabs[current_tab]["page"].url if current_tab in tabs else None
+                result["contexts"] = list(contexts.keys())
+                result["pool"] = len(spare)
+                result["profile"] = profile
+                result["har"] = {"record": record_har, "replay": replay_har}
+                now = time.monotonic()
+                result["tab_info"] = await asyncio.gather(*(tab_info(t, tab, now) for t, tab in list(tabs.items())))
+                result["rss_mb"] = round(process_tree_rss(os.getpid()) / 1024 / 1024, 1)
+                result["relaunches"] = dict(relaunches)
+                result["blocked"] = {
+                    name: dict(entry["blocking"]["counts"])
+                    for name, entry in contexts.items() if entry["blocking"]["counts"]
+                }
+
+            elif action == "open":
+                context_name = cmd.get("context") or "default"
+                policy = block_policy(cmd.get("block"))
+                await make_room()
+                entry, new_page = await get_context(context_name)
+                if new_page is None:
+                    new_page = await entry["context"].new_page()
+                new_tab = add_tab(new_page, context_name)
+                async with use_tab(new_tab) as tab:
+                    try:
+                        await set_blocking(new_page, tab["blocking"], policy)
+                        result.update(await load_page(new_page, cmd.get("url"), cmd))
+                    except Exception:
+                        del tabs[new_tab]
+                        await new_page.close()
+                        raise
                     result["tab"] = new_tab
-                    result["title"] = await new_page.title()
-
-                elif action == "navigate":
-                    url = cmd.get("url")
-                    if not url.startswith(("http://", "https://")):
-                        url = "https://" + url
-                    await page.goto(url, wait_until="domcontentloaded")
-                    result["title"] = await page.title()
-
-                elif action == "tabs":
-                    result["tabs"] = []
-                    for tid, p in pages.items():
-                        result["tabs"].append({
-                            "id": tid,
-                            "url": p.url,
-                            "title": await p.title(),
-                            "active": tid == current_tab,
-                        })
-
-                elif action == "focus":
-                    tab_id = cmd.get("tab_id")
-                    if tab_id in pages:
-                        current_tab = tab_id
-                        await pages[tab_id].bring_to_front()
-                    else:
-                        result = {"status": "error", "error": f"Tab not found: {tab_id}"}
-
-                elif action == "close":
-                    tab_id = cmd.get("tab_id") or current_tab
-                    if tab_id in pages:
-                        await pages[tab_id].close()
-                        del pages[tab_id]
-                        if tab_id == current_tab and pages:
-                            current_tab = list(pages.keys())[0]
-                    else:
-                        result = {"status": "error", "error": f"Tab not found: {tab_id}"}
-
-                elif action == "snapshot":
-                    snapshot = await page.accessibility.snapshot()
-                    result["snapshot"] = format_snapshot(snapshot)
-
-                elif action == "screenshot":
-                    fd, path = tempfile.mkstemp(suffix=".png")
-                    os.close(fd)
-                    selector = cmd.get("selector")
-                    if selector:
-                        element = page.locator(selector)
-                        await element.screenshot(path=path)
-                    else:
-                        await page.screenshot(path=path)
-                    result["path"] = path
-
-                elif action == "click":
-                    selector = cmd.get("selector")
-                    await page.click(selector)
-
-                elif action == "type":
-                    selector = cmd.get("selector")
-                    text = cmd.get("text")
-                    await page.fill(selector, text)
-
-                elif action == "select":
-                    selector = cmd.get("selector")
-                    value = cmd.get("value")
-                    await page.select_option(selector, value)
-
-                elif action == "console":
-                    # Return console messages (simplified)
-                    result["messages"] = []  # Would need to track these
-
-                elif action == "pdf":
-                    fd, path = tempfile.mkstemp(suffix=".pdf")
-                    os.close(fd)
-                    await page.pdf(path=path)
-                    result["path"] = path
-
-                elif action == "stop":
-                    result["status"] = "stopping"
-                    # Will exit after response
-
-                else:
-                    result = {"status": "error", "error": f"Unknown action: {action}"}
+                    if not cmd.get("background"):
+                        current_tab = new_tab
+
+            elif action == "tabs":
+                result["tabs"] = []
+                for tid, tab in list(tabs.items()):
+                    result["tabs"].append({
+                        "id": tid,
+                        "url": tab["page"].url,
+                        "title": await tab["page"].title(),
+                        "active": tid == current_tab,
+                        "context": tab["context"],
+                    })
+
+            elif action == "contexts":
+                now = time.monotonic()
+                result["contexts"] = [
+                    {
+                        "name": name,
+                        "tabs": sum(tab["context"] == name for tab in tabs.values()),
+                        "idle": round(now - entry["used"], 1),
+                    }
+                    for name, entry in contexts.items()
+                ]
+                result["pool"] = len(spare)
+
+            elif action == "close_context":
+                name = cmd.get("context")
+                if name == "default":
+                    raise ValueError("The default context can't be closed")
+                if name not in contexts:
+                    raise LookupError(f"Context not found: {name}")
+                async with contexts_lock:
+                    await close_context(name, save=not cmd.get("forget"))
+
+            elif action == "block":
+                # Set the policy of a whole context
+                name = cmd.get("context") or "default"
+                if name not in contexts:
+                    raise LookupError(f"Context not found: {name}")
+                entry = contexts[name]
+                await set_blocking(entry["context"], entry["blocking"], block_policy(cmd.get("block")))
+                result["context"] = name
+                result["blocked"] = dict(entry["blocking"]["counts"])
+
+            elif action == "focus":
+                async with use_tab(tab_id) as tab:
+                    current_tab = tab_id
+                    await tab["page"].bring_to_front()
+
+            elif action == "close":
+                async with use_tab(tab_id):
+                    await drop_tab(tab_id)
+
+            elif action == "stop":
+                result["status"] = "stopping"
+                stop.set()  # Shut down once the response is out
+
+            elif action == "crawl":
+                result.update(await crawl(cmd, emit))
+
+            elif action == "metrics":
+                result["since"] = metrics_since
+                result["actions"] = summarize_metrics(metrics)
+                if cmd.get("reset"):
+                    metrics.clear()
+                    metrics_since = time.time()
+
+            elif action in EVENT_STREAMS:
+                # Read without the tab lock, so a hung navigation can be inspected
+                tab = tabs.get(tab_id)
+                if not tab:
+                    raise LookupError(f"Tab not found: {tab_id}")
+                result["tab"] = tab_id
+                result.update(read_events(tab, action, cmd))
+
+            elif action in TAB_ACTIONS:
+                async with use_tab(tab_id) as tab:
+                    cmd["_admitted"] = time.perf_counter()  # Waiting for the tab counts as queueing
+                    result["tab"] = tab_id
+                    result.update(await run_tab_action(action, tab, cmd))
+
+            else:
+                result = {"status": "error", "error": f"Unknown action: {action}"}
+
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+
+        return result
+
+    async def run_tab_action(action: str, tab: dict, cmd: dict) -> dict:
+        page = tab["page"]
+        result = {}
+
+        timeout = cmd["timeout"] * 1000 if cmd.get("timeout") else None
+
+        if action == "navigate":
+            await set_blocking(page, tab["blocking"], block_policy(cmd.get("block")))
+            result.update(await load_page(page, cmd.get("url"), cmd))
+
+        elif action == "wait":
+            deadline = time.monotonic() + cmd["timeout"] if cmd.get("timeout") else None
+            state = cmd.get("wait")
+            if state and state != "commit":  # An open tab is always past commit
+                if state not in LOAD_STATES:
+                    raise ValueError(f"wait must be one of {', '.join(LOAD_STATES)}")
+                await page.wait_for_load_state(state, timeout=remaining_ms(deadline))
+            await wait_ready(page, cmd, deadline)
+
+        elif action == "snapshot":
+            root = None
+            if cmd.get("root"):
+                root = await page.query_selector(cmd["root"])
+                if root is None:
+                    raise LookupError(f"No element matches {cmd['root']}")
+            tree = await page.accessibility.snapshot(root=root)
+            rows = walk_snapshot(
+                tree, tab["refs"], cmd.get("max_depth"), bool(cmd.get("interactive_only")), cmd.get("root")
+            )
+
+            options = (cmd.get("root"), cmd.get("max_depth"), bool(cmd.get("interactive_only")))
+            previous = tab["last_snapshot"]
+            if cmd.get("diff") and previous and previous["options"] == options:
+                result["snapshot"], result["diff"] = diff_snapshot(previous["lines"], rows)
+            else:
+                result["snapshot"] = format_snapshot(rows)
+            result["nodes"] = len(rows)
+
+            tab["last_snapshot"] = {
+                "options": options,
+                "lines": {row["ref"]: "  " * row["depth"] + row["text"] for row in rows},
+            }
+            tab["targets"].update(
+                (row["ref"], (cmd.get("root"), row["role"], row["name"], row["nth"])) for row in rows
+            )
+
+        elif action == "screenshot":
+            selector = cmd.get("selector")
+            element = None
+            if selector:
+                element = ref_locator(page, tab["targets"], selector) or page.locator(selector)
+            data = await take_screenshot(page, element, cmd)
+            fmt = cmd.get("format") or "png"
+            result.update(capture_result(data, IMAGE_FORMATS[fmt], f".{fmt}", bool(cmd.get("inline"))))
+
+        elif action == "click":
+            selector = cmd.get("selector")
+            if target := ref_locator(page, tab["targets"], selector):
+                await target.click(timeout=timeout)
+            else:
+                await page.click(selector, timeout=timeout)
+
+        elif action == "type":
+            selector = cmd.get("selector")
+            text = cmd.get("text")
+            if target := ref_locator(page, tab["targets"], selector):
+                await target.fill(text, timeout=timeout)
+            else:
+                await page.fill(selector, text, timeout=timeout)
+
+        elif action == "select":
+            selector = cmd.get("selector")
+            value = cmd.get("value")
+            if target := ref_locator(page, tab["targets"], selector):
+                await target.select_option(value, timeout=timeout)
+            else:
+                await page.select_option(selector, value, timeout=timeout)
+
+        elif action == "pdf":
+            data = await page.pdf(print_background=bool(cmd.get("background")))
+            result.update(capture_result(data, "application/pdf", ".pdf", bool(cmd.get("inline"))))
+
+        return result
+
+    async def read_request(reader) -> bytes:
+        # One request line from a client; b"" once it hangs up. A line over
+        # the reader's limit is skipped up to its newline and raises
+        # ValueError, leaving the connection usable for the requests after it.
+        try:
+            return await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            return e.partial  # A last line without a newline, or b"" at the end
+        except asyncio.LimitOverrunError as e:
+            consumed = e.consumed
+        try:
+            while True:
+                await reader.readexactly(consumed)
+                try:
+                    await reader.readuntil(b"\n")
+                    break
+                except asyncio.LimitOverrunError as e:
+                    consumed = e.consumed
+        except asyncio.IncompleteReadError:
+            return b""
+        raise ValueError(f"Request too long (over {MAX_REQUEST_BYTES} bytes)")
 
-            except Exception as e:
-                result = {"status": "error", "error": str(e)}
+    async def handle_client(reader, writer):
+        # One connection carries any number of requests, one JSON line each,
+        # answered with the "id" they carried. Requests naming a tab_id run
+        # concurrently (serialized per tab), so their responses may come back
+        # out of order. The rest default to current_tab, which earlier
+        # requests may change, so they run in order on the connection's lane.
+        lane = asyncio.Lock()
+        pending = set()
+
+        async def emit(cmd: dict, event: dict) -> None:
+            # An intermediate response of a streaming action, e.g. one crawled page
+            if "id" in cmd:
+                event["id"] = cmd["id"]
+            writer.write(json.dumps(event).encode() + b"\n")
+            await writer.drain()
 
+        async def serve(cmd: dict, started: float, queued) -> None:
+            if queued:
+                async with queued:
+                    result = await dispatch(cmd, lambda event: emit(cmd, event))
+            else:
+                result = await dispatch(cmd, lambda event: emit(cmd, event))
+            if "id" in cmd:
+                result["id"] = cmd["id"]
+            if cmd.get("action") in STREAM_ACTIONS:
+                result["done"] = True  # The last response for this request
+            finished = time.perf_counter()
+            result["elapsed_ms"] = round((finished - started) * 1000, 2)
+            action = cmd.get("action")
+            record_metric(
+                action if action in DAEMON_ACTIONS else "unknown",
+                result["elapsed_ms"],
+                (cmd.get("_admitted", finished) - started) * 1000,
+                result.get("status") == "error",
+            )
             writer.write(json.dumps(result).encode() + b"\n")
-            await writer.drain()
 
-            if action == "stop":
-                await browser.close()
-                await pw.stop()
-                clear_state()
-                sys.exit(0)
+        def reject(error: str, request_id=None) -> None:
+            # A line that never became a request; the connection carries on
+            response = {"status": "error", "error": error}
+            if request_id is not None:
+                response["id"] = request_id
+            writer.write(json.dumps(response).encode() + b"\n")
 
+        try:
+            while True:
+                try:
+                    data = await read_request(reader)
+                except ValueError as e:
+                    reject(str(e))
+                    await writer.drain()
+                    continue
+                if not data:
+                    break
+                started = time.perf_counter()
+                try:
+                    cmd = json.loads(data)
+                except ValueError as e:  # Bad JSON or bad UTF-8
+                    reject(f"Invalid request: {e}")
+                    await writer.drain()
+                    continue
+                if not isinstance(cmd, dict):
+                    reject("Invalid request: expected a JSON object")
+                    await writer.drain()
+                    continue
+
+                targeted = cmd.get("tab_id") and cmd.get("action") not in ("open", "focus", "close")
+                task = asyncio.create_task(serve(cmd, started, None if targeted else lane))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                await writer.drain()
+            if pending:
+                await asyncio.gather(*pending)
+            await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass  # Client went away, or the daemon is shutting down
         finally:
+            for task in pending:
+                task.cancel()
             writer.close()
-            await writer.wait_closed()
 
     # Start server
+    stop = asyncio.Event()
     SOCKET_PATH.unlink(missing_ok=True)
-    server = await asyncio.start_unix_server(handle_client, str(SOCKET_PATH))
+    server = await asyncio.start_unix_server(handle_client, str(SOCKET_PATH), limit=MAX_REQUEST_BYTES)
 
     print(f"Browser daemon started (PID: {os.getpid()})")
 
     # Handle signals
-    def signal_handler(sig, frame):
-        asyncio.create_task(shutdown())
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
 
-    async def shutdown():
-        await browser.close()
+    governor = asyncio.create_task(govern())
+    exporter = asyncio.create_task(export_metrics()) if metrics_file else None
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        server.close()
+        healing = True  # Closing below isn't a crash
+        governor.cancel()
+        if exporter:
+            exporter.cancel()
+            with suppress(OSError):
+                write_metrics()  # Final numbers
+        if filling:
+            filling.cancel()
+        for name in list(contexts):
+            if name != "default":
+                with suppress(Exception):
+                    await close_context(name)  # Saves named sessions to the profile
+        with suppress(Exception):
+            await contexts["default"]["context"].close()  # Flushes the disk cache or HAR
+        if launching:
+            with suppress(Exception):
+                await (await launching).close()
         await pw.stop()
+        SOCKET_PATH.unlink(missing_ok=True)
         clear_state()
-        server.close()
-        sys.exit(0)
-
-    signal.signal(signal.SIGTERM, signal_handler)
-    signal.signal(signal.SIGINT, signal_handler)
-
-    async with server:
-        await server.serve_forever()
 
 
-def format_snapshot(node: dict | None, depth: int = 0) -> str:
-    """Format accessibility tree for display."""
-    if not node:
-        return ""
-
-    lines = []
-    indent = "  " * depth
-    role = node.get("role", "")
-    name = node.get("name", "")
-
-    if role and name:
-        lines.append(f"{indent}{role}: {name}")
-    elif role:
-        lines.append(f"{indent}{role}")
+def read_events(tab: dict, stream: str, cmd: dict) -> dict:
+    """Return a tab's events after cursor `since`, with the cursor to pass next."""
+    since = int(cmd.get("since") or 0)
+    buffer = tab["events"][stream]
+    events = [e for e in buffer if e["seq"] > since]
+    # Events past the cursor that fell out of the ring buffer before this read
+    dropped = max(0, buffer[0]["seq"] - since - 1) if buffer else 0
+    if cmd.get("errors"):
+        if stream == "console":
+            events = [e for e in events if e["type"] in ("error", "pageerror")]
+        else:
+            events = [e for e in events if e["status"] is None or e["status"] >= 400]
+    if cmd.get("limit"):
+        events = events[-int(cmd["limit"]):]
+    return {"events": events, "cursor": tab["seq"][stream], "dropped": dropped}
+
+
+def walk_snapshot(
+    root: dict | None,
+    refs: dict,
+    max_depth: int | None = None,
+    interactive_only: bool = False,
+    scope: str | None = None,
+) -> list[dict]:
+    """Flatten an accessibility tree into rows in document order.
+
+    Rows are {"ref", "depth", "text", "role", "name", "nth"}. A node's ref
+    ("e12") is keyed in `refs` by its ancestors' roles and positions plus
+    its own role, name and position among same-named siblings. `refs` is
+    extended in place, so passing a tab's dict to every snapshot keeps a
+    node's ref stable while the page changes around it, including when an
+    ancestor is renamed. `nth` counts earlier nodes with the same role and
+    name, which is how a ref is resolved back to an element.
+
+    `scope` is the root selector a snapshot was taken under. Keys are
+    prefixed with it, because a position under one root is a different
+    node from the same position in the full page.
+
+    Built with an explicit stack, so deep trees cost no recursion.
+    """
+    rows = []
+    seen = {}  # (role, name) -> nodes so far
+    prefix = f"[{scope}]" if scope else ""  # Full-page keys start with "/" or are ""
+    stack = [(root, 0, 0, prefix, prefix)] if root else []
+    while stack:
+        node, depth, shown, path, key = stack.pop()
+        role, name = node.get("role", ""), node.get("name", "")
+        nth = seen.get((role, name), 0)
+        seen[(role, name)] = nth + 1
+
+        emit = bool(role) and (max_depth is None or depth <= max_depth)
+        if interactive_only and role not in INTERACTIVE_ROLES:
+            emit = False
+        if emit:
+            ref = refs.setdefault(key, f"e{len(refs) + 1}")
+            text = f"{role}: {name}" if name else role
+            if node.get("value") not in (None, ""):
+                text += f' = "{node["value"]}"'
+            text += f" [{ref}]"
+            states = [
+                state if node[state] is True else f"{state}={node[state]}"
+                for state in SNAPSHOT_STATES if node.get(state)
+            ]
+            if states:
+                text += f" ({', '.join(states)})"
+            rows.append({"ref": ref, "depth": shown, "text": text, "role": role, "name": name, "nth": nth})
+
+        counts = {}
+        children = []
+        for child in node.get("children", []):
+            child_role = child.get("role", "")
+            label = f"{child_role}:{child.get('name', '')}"
+            counts[child_role] = counts.get(child_role, 0) + 1
+            counts[label] = counts.get(label, 0) + 1
+            children.append((
+                child, depth + 1, shown + emit,
+                f"{path}/{child_role}#{counts[child_role]}",  # what its descendants see
+                f"{path}/{label}#{counts[label]}",  # its own identity
+            ))
+        stack.extend(reversed(children))
+
+    return rows
+
+
+def format_snapshot(rows: list[dict]) -> str:
+    """Format snapshot rows as an indented tree."""
+    return "\n".join("  " * row["depth"] + row["text"] for row in rows)
+
+
+def diff_snapshot(previous: dict, rows: list[dict]) -> tuple[str, dict]:
+    """Format only what changed since `previous` ({ref: line}).
+
+    Lines are prefixed "+" (new), "~" (changed) or "-" (gone).
+    """
+    lines, counts, current = [], {"added": 0, "changed": 0, "removed": 0}, set()
+    for row in rows:
+        line = "  " * row["depth"] + row["text"]
+        current.add(row["ref"])
+        old = previous.get(row["ref"])
+        if old is None:
+            lines.append(f"+ {line}")
+            counts["added"] += 1
+        elif old != line:
+            lines.append(f"~ {line}")
+            counts["changed"] += 1
+    for ref, line in previous.items():
+        if ref not in current:
+            lines.append(f"- {line}")
+            counts["removed"] += 1
+    return "\n".join(lines), counts
+
+
+def ref_locator(page, targets: dict, selector: str):
+    """Locator for a snapshot ref ("e12" or "ref=e12"), or None for other selectors."""
+    target = targets.get(selector.removeprefix("ref="))
+    if not target:
+        return None
+    root, role, name, nth = target
+    scope = page.locator(root).first if root else page
+    return scope.get_by_role(role, name=name, exact=True).nth(nth)
 
-    for child in node.get("children", []):
-        lines.append(format_snapshot(child, depth + 1))
 
-    return "\n".join(lines)
+# CLI Commands
 
+def block_spec(args) -> dict | None:
+    """Build the "block" field of a request from --block options."""
+    preset = getattr(args, "block", None)
+    if preset == "off":
+        return "off"
+    if not (preset or args.block_types or args.block_domains):
+        return None
+    return {"preset": preset, "types": args.block_types, "domains": args.block_domains}
+
+
+def wait_fields(args) -> dict:
+    """Request fields for the --wait/--wait-for/--wait-fn/--timeout options."""
+    fields = {
+        "wait": getattr(args, "wait", None),
+        "wait_for": getattr(args, "wait_for", None),
+        "wait_fn": getattr(args, "wait_fn", None),
+        "timeout": args.timeout,
+    }
+    return {k: v for k, v in fields.items() if v is not None}
+
+
+def format_timing(result: dict) -> str:
+    """One-line summary of a navigation's status and timings."""
+    timing = result.get("timing") or {}
+    parts = [f"HTTP {result['http_status']}"] if result.get("http_status") else []
+    for key, label in (("ttfb_ms", "TTFB"), ("dom_content_loaded_ms", "DCL"), ("load_ms", "load")):
+        if timing.get(key) is not None:
+            parts.append(f"{label} {timing[key]} ms")
+    if timing.get("transfer_bytes") is not None:
+        parts.append(f"{timing['transfer_bytes'] / 1024:.0f} KB in {timing['resources'] + 1} requests")
+    return ", ".join(parts)
+
+
+def call(command: dict) -> dict:
+    """Send a command, exiting with a message if the daemon is down or it fails."""
+    try:
+        result = send_command(command)
+    except ConnectionError:
+        print("Error: Browser daemon not running. Run: lp-browser start", file=sys.stderr)
+        sys.exit(1)
+    if result.get("status") == "error":
+        print(f"Error: {result.get('error')}", file=sys.stderr)
+        sys.exit(1)
+    return result
 
-# CLI Commands
 
 def cmd_start(args) -> None:
     """Start browser daemon."""
+    import asyncio
+
     if is_daemon_running():
         print("Browser daemon already running")
         return
 
-    # Auto-detect headless if no display
-    headless = args.headless or not os.environ.get("DISPLAY")
+    try:
+        if args.profile:
+            profile_dir(args.profile)  # Reject a bad name before forking
+        options = {
+            # Auto-detect headless if no display
+            "headless": args.headless or not os.environ.get("DISPLAY"),
+            "pool_size": args.pool_size,
+            "max_contexts": args.max_contexts,
+            "block": block_policy(block_spec(args)),
+            "profile": args.profile,
+            "cache_mb": args.cache_size,
+            "max_tabs": args.max_tabs,
+            "idle_timeout": args.idle_timeout,
+            "max_rss_mb": args.max_rss,
+            "metrics_file": os.path.abspath(args.metrics_file) if args.metrics_file else None,
+            "record_har": os.path.abspath(args.record_har) if args.record_har else None,
+            "replay_har": os.path.abspath(args.replay_har) if args.replay_har else None,
+            "har_missing": args.har_missing,
+        }
+        if args.replay_har and not os.path.exists(args.replay_har):
+            raise ValueError(f"HAR file not found: {args.replay_har}")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
     if args.foreground:
-        asyncio.run(run_daemon(headless=headless))
+        asyncio.run(run_daemon(**options))
     else:
         # Fork to background
         pid = os.fork()
@@ -300,141 +1688,430 @@ def cmd_start(args) -> None:
         else:
             # Child process
             os.setsid()
-            asyncio.run(run_daemon(headless=headless))
+            asyncio.run(run_daemon(**options))
 
 
 def cmd_stop(args) -> None:
     """Stop browser daemon."""
-    if not is_daemon_running():
+    try:
+        send_command({"action": "stop"})
+    except ConnectionError:
         print("Browser daemon not running")
         return
-
-    result = asyncio.run(send_command({"action": "stop"}))
     print("Browser daemon stopped")
 
 
 def cmd_status(args) -> None:
     """Show browser status."""
-    if not is_daemon_running():
+    try:
+        result = send_command({"action": "status"})
+    except ConnectionError:
         print("Browser daemon not running")
         return
 
-    result = asyncio.run(send_command({"action": "status"}))
     print(f"Status: running")
     print(f"Current tab: {result.get('current')}")
     print(f"URL: {result.get('url')}")
     print(f"Tabs: {len(result.get('tabs', []))}")
+    if result.get("profile"):
+        print(f"Profile: {result['profile']}")
+    har = result.get("har") or {}
+    if har.get("record"):
+        print(f"Recording HAR: {har['record']}")
+    if har.get("replay"):
+        print(f"Replaying HAR: {har['replay']}")
+    print(f"Browser memory: {result.get('rss_mb', 0):.0f} MB")
+    for tab in result.get("tab_info", []):
+        heap = f"{tab['js_heap_mb']:.1f} MB heap" if tab["js_heap_mb"] is not None else "heap n/a"
+        print(f"  {tab['id']}: {heap}, age {tab['age_s']}s, idle {tab['idle_s']}s ({tab['url'][:50]})")
+    if result.get("relaunches"):
+        print("Relaunches: " + ", ".join(f"{reason} {n}" for reason, n in result["relaunches"].items()))
+    for name, counts in result.get("blocked", {}).items():
+        by_type = ", ".join(f"{t} {n}" for t, n in sorted(counts.items(), key=lambda c: -c[1]))
+        print(f"Blocked in {name}: {sum(counts.values())} ({by_type})")
 
 
 def cmd_open(args) -> None:
     """Open URL in new tab."""
-    if not is_daemon_running():
-        print("Error: Browser daemon not running. Run: lp-browser start", file=sys.stderr)
-        sys.exit(1)
-
-    result = asyncio.run(send_command({"action": "open", "url": args.url}))
-    if result.get("status") == "error":
-        print(f"Error: {result.get('error')}", file=sys.stderr)
-        sys.exit(1)
-    print(f"Opened: {result.get('title')}")
+    result = call({
+        "action": "open",
+        "url": args.url,
+        "context": args.context,
+        "background": args.background,
+        "block": block_spec(args),
+        **wait_fields(args),
+    })
+    print(f"Opened: {result.get('title')} ({result.get('tab')})")
+    if timing := format_timing(result):
+        print(f"  {timing}")
 
 
 def cmd_navigate(args) -> None:
     """Navigate current tab."""
-    if not is_daemon_running():
-        print("Error: Browser daemon not running", file=sys.stderr)
-        sys.exit(1)
+    result = call({
+        "action": "navigate",
+        "url": args.url,
+        "tab_id": args.tab_id,
+        "block": block_spec(args),
+        **wait_fields(args),
+    })
+    print(f"Navigated to: {result.get('title')}")
+    if timing := format_timing(result):
+        print(f"  {timing}")
 
-    result = asyncio.run(send_command({"action": "navigate", "url": args.url}))
-    if result.get("status") == "error":
-        print(f"Error: {result.get('error')}", file=sys.stderr)
+
+def cmd_wait(args) -> None:
+    """Wait until a tab is ready."""
+    if not (args.wait or args.wait_for or args.wait_fn):
+        print("Error: specify --wait, --wait-for or --wait-fn", file=sys.stderr)
         sys.exit(1)
-    print(f"Navigated to: {result.get('title')}")
+    call({"action": "wait", "tab_id": args.tab_id, **wait_fields(args)})
+    print("Ready")
 
 
 def cmd_tabs(args) -> None:
     """List tabs."""
-    if not is_daemon_running():
-        print("Error: Browser daemon not running", file=sys.stderr)
-        sys.exit(1)
-
-    result = asyncio.run(send_command({"action": "tabs"}))
+    result = call({"action": "tabs"})
     for tab in result.get("tabs", []):
         active = "*" if tab["active"] else " "
         print(f"{active} {tab['id']}: {tab['title'][:50]} ({tab['url'][:50]})")
 
 
+def cmd_events(args) -> None:
+    """Print console or network events since a cursor."""
+    result = call({
+        "action": args.command,
+        "tab_id": args.tab_id,
+        "since": args.since,
+        "errors": args.errors,
+        "limit": args.limit,
+    })
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+        return
+    if result.get("dropped"):
+        print(f"... {result['dropped']} older events dropped")
+    for e in result.get("events", []):
+        if args.command == "console":
+            where = f" ({e['url']}:{e['line']})" if e.get("url") else ""
+            print(f"[{e['seq']}] {e['type']}: {e['text']}{where}")
+        else:
+            outcome = e.get("failure") or e["status"]
+            took = f" {e['duration_ms']:.0f} ms" if e.get("duration_ms", -1) >= 0 else ""
+            print(f"[{e['seq']}] {e['method']} {e['url']} -> {outcome} ({e['resource_type']}){took}")
+    print(f"Cursor: {result.get('cursor')} (next: --since {result.get('cursor')})")
+
+
+def cmd_focus(args) -> None:
+    """Make a tab the default for commands without --tab."""
+    call({"action": "focus", "tab_id": args.tab_id})
+    print(f"Focused: {args.tab_id}")
+
+
+def cmd_close(args) -> None:
+    """Close a tab."""
+    call({"action": "close", "tab_id": args.tab_id})
+    print("Closed")
+
+
+def cmd_block(args) -> None:
+    """Set the request-blocking policy of a context."""
+    spec = block_spec(args)
+    result = call({"action": "block", "context": args.context, "block": spec})
+    state = "off" if spec in (None, "off") else "on"
+    print(f"Blocking {state} for context {result.get('context')} ({sum(result.get('blocked', {}).values())} blocked so far)")
+
+
+def cmd_contexts(args) -> None:
+    """List browser contexts."""
+    result = call({"action": "contexts"})
+    for ctx in result.get("contexts", []):
+        print(f"  {ctx['name']}: {ctx['tabs']} tabs, idle {ctx['idle']:.0f}s")
+    print(f"Pre-warmed: {result.get('pool')}")
+
+
+def cmd_profiles(args) -> None:
+    """List or delete persistent profiles."""
+    import shutil
+
+    if args.delete:
+        path = profile_dir(args.delete)
+        if not path.exists():
+            print(f"Error: Profile not found: {args.delete}", file=sys.stderr)
+            sys.exit(1)
+        if is_daemon_running() and (load_state() or {}).get("profile") == args.delete:
+            print(f"Error: Profile in use: {args.delete} (lp-browser stop first)", file=sys.stderr)
+            sys.exit(1)
+        shutil.rmtree(path)
+        print(f"Deleted profile: {args.delete}")
+        return
+
+    profiles = sorted(p for p in PROFILES_DIR.iterdir() if p.is_dir()) if PROFILES_DIR.exists() else []
+    if not profiles:
+        print("No profiles")
+        return
+    for path in profiles:
+        saved = sorted(f.stem for f in (path / "contexts").glob("*.json"))
+        line = f"  {path.name}: {dir_size(path) / 1024 / 1024:.1f} MB"
+        if saved:
+            line += f", saved contexts: {', '.join(unquote(name) for name in saved)}"
+        print(line)
+
+
+def cmd_close_context(args) -> None:
+    """Close a context and all its tabs."""
+    call({"action": "close_context", "context": args.name, "forget": args.forget})
+    print(f"{'Forgot' if args.forget else 'Closed'} context: {args.name}")
+
+
 def cmd_snapshot(args) -> None:
     """Get accessibility tree."""
-    if not is_daemon_running():
-        print("Error: Browser daemon not running", file=sys.stderr)
-        sys.exit(1)
-
-    result = asyncio.run(send_command({"action": "snapshot"}))
-    if result.get("status") == "error":
-        print(f"Error: {result.get('error')}", file=sys.stderr)
-        sys.exit(1)
-    print(result.get("snapshot", ""))
+    result = call({
+        "action": "snapshot",
+        "tab_id": args.tab_id,
+        "interactive_only": args.interactive_only,
+        "max_depth": args.max_depth,
+        "root": args.root,
+        "diff": args.diff,
+    })
+    if "diff" in result:
+        diff = result["diff"]
+        print(f"# {diff['added']} added, {diff['changed']} changed, {diff['removed']} removed")
+    if result.get("snapshot"):
+        print(result["snapshot"])
+
+
+def save_capture(result: dict, output: str | None, label: str) -> None:
+    """Write inline capture bytes to --output ('-' for stdout), or report the daemon's file."""
+    if not output:
+        print(f"{label} saved: {result.get('path')} ({result.get('bytes', 0) / 1024:.0f} KB)")
+        return
+    data = base64.b64decode(result["data"])
+    if output == "-":
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+        return
+    Path(output).write_bytes(data)
+    print(f"{label} saved: {output} ({len(data) / 1024:.0f} KB)")
 
 
 def cmd_screenshot(args) -> None:
     """Take screenshot."""
-    if not is_daemon_running():
-        print("Error: Browser daemon not running", file=sys.stderr)
-        sys.exit(1)
-
-    cmd = {"action": "screenshot"}
+    cmd = {
+        "action": "screenshot",
+        "tab_id": args.tab_id,
+        "format": args.format,
+        "quality": args.quality,
+        "full_page": args.full_page,
+        "scale": args.scale,
+        "inline": bool(args.output),
+    }
     if args.selector:
         cmd["selector"] = args.selector
+    if args.clip:
+        try:
+            x, y, width, height = (float(v) for v in args.clip.split(","))
+        except ValueError:
+            print("Error: --clip takes x,y,width,height", file=sys.stderr)
+            sys.exit(1)
+        cmd["clip"] = {"x": x, "y": y, "width": width, "height": height}
 
-    result = asyncio.run(send_command(cmd))
-    if result.get("status") == "error":
-        print(f"Error: {result.get('error')}", file=sys.stderr)
-        sys.exit(1)
-    print(f"Screenshot saved: {result.get('path')}")
+    save_capture(call(cmd), args.output, "Screenshot")
 
 
 def cmd_click(args) -> None:
     """Click element."""
-    if not is_daemon_running():
-        print("Error: Browser daemon not running", file=sys.stderr)
-        sys.exit(1)
-
-    result = asyncio.run(send_command({"action": "click", "selector": args.selector}))
-    if result.get("status") == "error":
-        print(f"Error: {result.get('error')}", file=sys.stderr)
-        sys.exit(1)
+    call({"action": "click", "selector": args.selector, "tab_id": args.tab_id, **wait_fields(args)})
     print("Clicked")
 
 
 def cmd_type(args) -> None:
     """Type into element."""
-    if not is_daemon_running():
-        print("Error: Browser daemon not running", file=sys.stderr)
-        sys.exit(1)
-
-    result = asyncio.run(send_command({
+    call({
         "action": "type",
         "selector": args.selector,
-        "text": args.text
-    }))
-    if result.get("status") == "error":
-        print(f"Error: {result.get('error')}", file=sys.stderr)
-        sys.exit(1)
+        "text": args.text,
+        "tab_id": args.tab_id,
+        **wait_fields(args),
+    })
     print("Typed")
 
 
 def cmd_pdf(args) -> None:
     """Save page as PDF."""
-    if not is_daemon_running():
-        print("Error: Browser daemon not running", file=sys.stderr)
+    result = call({
+        "action": "pdf",
+        "tab_id": args.tab_id,
+        "background": args.background,
+        "inline": bool(args.output),
+    })
+    save_capture(result, args.output, "PDF")
+
+
+def cmd_batch(args) -> None:
+    """Run a JSONL script of actions over one connection."""
+    commands = []
+    try:
+        source = sys.stdin if args.file == "-" else open(args.file)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    with source:
+        for lineno, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                command = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Error: line {lineno}: {e}", file=sys.stderr)
+                sys.exit(1)
+            if command.get("action") in STREAM_ACTIONS:
+                print(f"Error: line {lineno}: run {command['action']} on its own "
+                      f"(lp-browser {command['action']}), not in a batch", file=sys.stderr)
+                sys.exit(1)
+            commands.append(command)
+
+    steps = errors = 0
+    started = time.perf_counter()
+    try:
+        for command, response, rtt in send_batch(commands, window=1 if args.stop_on_error else BATCH_WINDOW):
+            steps += 1
+            step = {"step": response.pop("id") + 1, "action": command.get("action"), **response}
+            step["rtt_ms"] = round(rtt, 2)
+            print(json.dumps(step, ensure_ascii=False), flush=True)
+            if response.get("status") == "error":
+                errors += 1
+                if args.stop_on_error:
+                    break
+    except (ConnectionError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
-    result = asyncio.run(send_command({"action": "pdf"}))
-    if result.get("status") == "error":
-        print(f"Error: {result.get('error')}", file=sys.stderr)
+    total = (time.perf_counter() - started) * 1000
+    print(f"{steps} steps, {errors} errors, {total:.0f} ms", file=sys.stderr)
+    if errors:
         sys.exit(1)
-    print(f"PDF saved: {result.get('path')}")
+
+
+def cmd_crawl(args) -> None:
+    """Load many URLs in parallel and stream one JSONL result per page."""
+    try:
+        source = sys.stdin if args.file == "-" else open(args.file)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    with source:
+        urls = [line.strip() for line in source if line.strip() and not line.startswith("#")]
+    if not urls:
+        print("Error: no URLs", file=sys.stderr)
+        sys.exit(1)
+    output_dir = Path(args.output_dir) if args.output_dir else None
+    if output_dir:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    command = {
+        "action": "crawl",
+        "urls": urls,
+        "extract": args.extract or ["text"],
+        "concurrency": args.concurrency,
+        "per_host": args.per_host,
+        "retries": args.retries,
+        "max_chars": args.max_chars,
+        "context": args.context,
+        "block": block_spec(args),
+        "format": args.format,
+        "inline": output_dir is not None,
+        **wait_fields(args),
+    }
+    ok = failed = 0
+    started = time.perf_counter()
+    try:
+        for response in send_stream(command):
+            if response.get("done"):
+                if response.get("status") == "error":
+                    print(f"Error: {response['error']}", file=sys.stderr)
+                    sys.exit(1)
+                break
+            response.pop("id", None)
+            shot = response.get("screenshot")
+            if output_dir and shot and "data" in shot:
+                path = output_dir / f"{response['index']:05d}.{args.format}"
+                path.write_bytes(base64.b64decode(shot.pop("data")))
+                shot["path"] = str(path)
+            if response["status"] == "ok":
+                ok += 1
+            else:
+                failed += 1
+            print(json.dumps(response, ensure_ascii=False), flush=True)
+    except ConnectionError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    total = time.perf_counter() - started
+    print(f"{ok + failed} pages, {failed} failed, {total:.1f} s ({(ok + failed) / total:.1f} pages/s)", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+def cmd_stats(args) -> None:
+    """Show per-action counts, latency and queue-wait percentiles."""
+    result = call({"action": "metrics", "reset": args.reset})
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+        return
+    actions = result.get("actions", {})
+    if not actions:
+        print("No requests recorded.")
+        return
+    since = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(result["since"]))
+    print(f"Since {since}")
+    print(f"{'Action':<14}{'Count':>7}{'Err':>6}   {'latency p50/p95/p99 ms':<26}queue p50/p95 ms")
+    for action, m in sorted(actions.items(), key=lambda a: -a[1]["count"] * a[1]["mean_ms"]):
+        latency = "/".join(f"{m[f'p{p}_ms']:.1f}" for p in (50, 95, 99))
+        queue = "/".join(f"{m[f'queue_p{p}_ms']:.1f}" for p in (50, 95))
+        print(f"{action:<14}{m['count']:>7}{m['errors']:>6}   {latency:<26}{queue}")
+
+
+def cmd_bench(args) -> None:
+    """Measure client startup and command round-trip times."""
+    import subprocess
+
+    def report(label: str, samples: list[float]) -> None:
+        samples.sort()
+        p50, p95 = percentile(samples, 50), percentile(samples, 95)
+        print(f"{label:<28} p50 {p50:7.2f} ms   p95 {p95:7.2f} ms")
+
+    # Interpreter plus this module's imports, no daemon involved
+    startup = []
+    for _ in range(args.n):
+        t = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import lobster_powers.tools.browser"], check=True)
+        startup.append((time.perf_counter() - t) * 1000)
+    report("python + import", startup)
+
+    if not is_daemon_running():
+        print("Daemon not running; start it to measure round trips.")
+        return
+
+    one_shot = []
+    for _ in range(args.n):
+        t = time.perf_counter()
+        send_command({"action": "status"})
+        one_shot.append((time.perf_counter() - t) * 1000)
+    report("status (new connection)", one_shot)
+
+    pipelined = [rtt for _, _, rtt in send_batch([{"action": "status"}] * args.n, window=1)]
+    report("status (kept connection)", pipelined)
+
+    cli = []
+    for _ in range(args.n):
+        t = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "lobster_powers.tools.browser", "status"],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        cli.append((time.perf_counter() - t) * 1000)
+    report("lp-browser status (CLI)", cli)
 
 
 def main():
@@ -445,10 +2122,81 @@ def main():
     )
     subparsers = parser.add_subparsers(dest="command", required=True)
 
+    # Options shared by commands that act on a tab
+    tab_opts = argparse.ArgumentParser(add_help=False)
+    tab_opts.add_argument("--tab", dest="tab_id", help="Tab to act on (default: current tab)")
+
+    # Per-call timeout, and readiness waits for navigation
+    timeout_opts = argparse.ArgumentParser(add_help=False)
+    timeout_opts.add_argument("--timeout", type=float, metavar="SECONDS", help="Give up after this long")
+    wait_opts = argparse.ArgumentParser(add_help=False, parents=[timeout_opts])
+    wait_opts.add_argument(
+        "--wait", choices=WAIT_STATES,
+        help="Load state to wait for (default: domcontentloaded; networkidle suits SPAs)",
+    )
+    wait_opts.add_argument("--wait-for", metavar="SELECTOR", help="Then wait until this element is present")
+    wait_opts.add_argument("--wait-fn", metavar="JS", help="Then wait until this JS expression is truthy")
+    # `wait` acts on a page that is already open, so "commit" means nothing there
+    load_opts = argparse.ArgumentParser(add_help=False, parents=[timeout_opts])
+    load_opts.add_argument(
+        "--wait", choices=LOAD_STATES,
+        help="Load state to wait for (networkidle suits SPAs)",
+    )
+    load_opts.add_argument("--wait-for", metavar="SELECTOR", help="Then wait until this element is present")
+    load_opts.add_argument("--wait-fn", metavar="JS", help="Then wait until this JS expression is truthy")
+
+    # Request blocking options
+    block_opts = argparse.ArgumentParser(add_help=False)
+    block_opts.add_argument("--block", choices=list(BLOCK_PRESETS), help="Blocking preset")
+    block_opts.add_argument(
+        "--block-type", dest="block_types", action="append", default=[], metavar="TYPE",
+        help="Also block this resource type (image, font, script, ...); repeatable",
+    )
+    block_opts.add_argument(
+        "--block-domain", dest="block_domains", action="append", default=[], metavar="DOMAIN",
+        help="Also block requests to this domain and its subdomains; repeatable",
+    )
+
     # start
-    start_p = subparsers.add_parser("start", help="Start browser daemon")
+    start_p = subparsers.add_parser("start", parents=[block_opts], help="Start browser daemon")
     start_p.add_argument("--headless", action="store_true", help="Run headless")
     start_p.add_argument("--foreground", "-f", action="store_true", help="Run in foreground")
+    start_p.add_argument(
+        "--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+        help=f"Pre-warmed contexts kept ready (default: {DEFAULT_POOL_SIZE})",
+    )
+    start_p.add_argument(
+        "--max-contexts", type=int, default=DEFAULT_MAX_CONTEXTS,
+        help=f"Open contexts before the least recently used is closed (default: {DEFAULT_MAX_CONTEXTS})",
+    )
+    start_p.add_argument("--profile", help="Persistent profile: keep cache, cookies and logins across restarts")
+    start_p.add_argument(
+        "--cache-size", type=int, default=DEFAULT_CACHE_MB, metavar="MB",
+        help=f"Disk cache cap for --profile (default: {DEFAULT_CACHE_MB})",
+    )
+    start_p.add_argument(
+        "--max-tabs", type=int, default=DEFAULT_MAX_TABS,
+        help=f"Open tabs before the least recently used idle one is closed (default: {DEFAULT_MAX_TABS})",
+    )
+    start_p.add_argument(
+        "--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT, metavar="SECONDS",
+        help=f"Close tabs unused this long, except the current one; 0 keeps them (default: {DEFAULT_IDLE_TIMEOUT})",
+    )
+    start_p.add_argument(
+        "--max-rss", type=int, default=DEFAULT_MAX_RSS_MB, metavar="MB",
+        help=f"Relaunch the browser when it uses more memory; 0 never (default: {DEFAULT_MAX_RSS_MB})",
+    )
+    start_p.add_argument(
+        "--metrics-file", metavar="PATH",
+        help=f"Write per-action metrics here in Prometheus text format every {METRICS_INTERVAL}s",
+    )
+    har_group = start_p.add_mutually_exclusive_group()
+    har_group.add_argument("--record-har", metavar="FILE", help="Record traffic (one file per context, on stop)")
+    har_group.add_argument("--replay-har", metavar="FILE", help="Answer requests from a recorded HAR file")
+    start_p.add_argument(
+        "--har-missing", choices=("abort", "fallback"), default="abort",
+        help="Requests not in the HAR: fail them (offline, default) or go to the network",
+    )
     start_p.set_defaults(func=cmd_start)
 
     # stop
@@ -460,43 +2208,158 @@ def main():
     status_p.set_defaults(func=cmd_status)
 
     # open
-    open_p = subparsers.add_parser("open", help="Open URL in new tab")
+    open_p = subparsers.add_parser("open", parents=[block_opts, wait_opts], help="Open URL in new tab")
     open_p.add_argument("url", help="URL to open")
+    open_p.add_argument("--background", action="store_true", help="Keep the current tab as the default")
+    open_p.add_argument("--context", help="Named context to open in (isolated cookies/storage, created on demand)")
     open_p.set_defaults(func=cmd_open)
 
     # navigate
-    nav_p = subparsers.add_parser("navigate", help="Navigate current tab")
+    nav_p = subparsers.add_parser("navigate", parents=[tab_opts, block_opts, wait_opts], help="Navigate current tab")
     nav_p.add_argument("url", help="URL to navigate to")
     nav_p.set_defaults(func=cmd_navigate)
 
+    # wait
+    wait_p = subparsers.add_parser("wait", parents=[tab_opts, load_opts], help="Wait until a tab is ready")
+    wait_p.set_defaults(func=cmd_wait)
+
     # tabs
     tabs_p = subparsers.add_parser("tabs", help="List tabs")
     tabs_p.set_defaults(func=cmd_tabs)
 
+    # focus
+    focus_p = subparsers.add_parser("focus", help="Switch the current tab")
+    focus_p.add_argument("tab_id", help="Tab ID")
+    focus_p.set_defaults(func=cmd_focus)
+
+    # close
+    close_p = subparsers.add_parser("close", help="Close a tab")
+    close_p.add_argument("tab_id", nargs="?", help="Tab ID (default: current tab)")
+    close_p.set_defaults(func=cmd_close)
+
+    # block
+    block_p = subparsers.add_parser("block", help="Set request blocking for a context")
+    block_p.add_argument("block", nargs="?", choices=[*BLOCK_PRESETS, "off"], help="Preset, or off")
+    block_p.add_argument("--type", dest="block_types", action="append", default=[], help="Resource type; repeatable")
+    block_p.add_argument("--domain", dest="block_domains", action="append", default=[], help="Domain; repeatable")
+    block_p.add_argument("--context", help="Context (default: default)")
+    block_p.set_defaults(func=cmd_block)
+
+    # contexts
+    contexts_p = subparsers.add_parser("contexts", help="List browser contexts")
+    contexts_p.set_defaults(func=cmd_contexts)
+
+    # profiles
+    profiles_p = subparsers.add_parser("profiles", help="List persistent profiles")
+    profiles_p.add_argument("--delete", metavar="NAME", help="Delete a profile")
+    profiles_p.set_defaults(func=cmd_profiles)
+
+    # close-context
+    close_ctx_p = subparsers.add_parser("close-context", help="Close a context and its tabs")
+    close_ctx_p.add_argument("name", help="Context name")
+    close_ctx_p.add_argument("--forget", action="store_true", help="Also drop its session saved in the profile")
+    close_ctx_p.set_defaults(func=cmd_close_context)
+
     # snapshot
-    snap_p = subparsers.add_parser("snapshot", help="Get accessibility tree")
+    snap_p = subparsers.add_parser("snapshot", parents=[tab_opts], help="Get accessibility tree")
+    snap_p.add_argument("--interactive-only", "-i", action="store_true", help="Only buttons, links, inputs, ...")
+    snap_p.add_argument("--max-depth", type=int, help="Don't descend deeper than this")
+    snap_p.add_argument("--root", metavar="SELECTOR", help="Only the subtree under this element")
+    snap_p.add_argument("--diff", action="store_true", help="Only what changed since the last snapshot of this tab")
     snap_p.set_defaults(func=cmd_snapshot)
 
     # screenshot
-    ss_p = subparsers.add_parser("screenshot", help="Take screenshot")
-    ss_p.add_argument("--selector", "-s", help="Element selector")
+    ss_p = subparsers.add_parser("screenshot", parents=[tab_opts], help="Take screenshot")
+    ss_p.add_argument("--selector", "-s", help="Element selector or snapshot ref")
+    ss_p.add_argument("--format", choices=list(IMAGE_FORMATS), default="png", help="Image format (default: png)")
+    ss_p.add_argument("--quality", type=int, help="JPEG/WebP quality, 0-100")
+    ss_p.add_argument("--full-page", action="store_true", help="Whole scrollable page, not just the viewport")
+    ss_p.add_argument("--clip", metavar="X,Y,W,H", help="Only this region (CSS pixels)")
+    ss_p.add_argument(
+        "--scale", choices=["device", "css"], default="device",
+        help="device: one pixel per device pixel (default); css: one per CSS pixel, smaller on HiDPI",
+    )
+    ss_p.add_argument("--output", "-o", help="Write the image here ('-' for stdout) instead of the capture dir")
     ss_p.set_defaults(func=cmd_screenshot)
 
     # click
-    click_p = subparsers.add_parser("click", help="Click element")
-    click_p.add_argument("selector", help="CSS selector")
+    click_p = subparsers.add_parser("click", parents=[tab_opts, timeout_opts], help="Click element")
+    click_p.add_argument("selector", help="CSS selector or snapshot ref (e12)")
     click_p.set_defaults(func=cmd_click)
 
     # type
-    type_p = subparsers.add_parser("type", help="Type into element")
-    type_p.add_argument("selector", help="CSS selector")
+    type_p = subparsers.add_parser("type", parents=[tab_opts, timeout_opts], help="Type into element")
+    type_p.add_argument("selector", help="CSS selector or snapshot ref (e12)")
     type_p.add_argument("text", help="Text to type")
     type_p.set_defaults(func=cmd_type)
 
+    # console / network
+    for name, help_text, errors_help in (
+        ("console", "Show console messages and page errors", "Only errors and uncaught exceptions"),
+        ("network", "Show finished and failed requests", "Only failed requests and HTTP errors"),
+    ):
+        events_p = subparsers.add_parser(name, parents=[tab_opts], help=help_text)
+        events_p.add_argument("--since", type=int, default=0, metavar="CURSOR", help="Only events after this cursor")
+        events_p.add_argument("--errors", action="store_true", help=errors_help)
+        events_p.add_argument("--limit", type=int, help="Only the last N events")
+        events_p.add_argument("--json", action="store_true", help="Print the raw response")
+        events_p.set_defaults(func=cmd_events)
+
     # pdf
-    pdf_p = subparsers.add_parser("pdf", help="Save as PDF")
+    pdf_p = subparsers.add_parser("pdf", parents=[tab_opts], help="Save as PDF")
+    pdf_p.add_argument("--background", action="store_true", help="Print background graphics")
+    pdf_p.add_argument("--output", "-o", help="Write the PDF here ('-' for stdout) instead of the capture dir")
     pdf_p.set_defaults(func=cmd_pdf)
 
+    # batch
+    batch_p = subparsers.add_parser("batch", help="Run a JSONL script of actions over one connection")
+    batch_p.add_argument("file", help="JSONL file, one action per line ('-' for stdin)")
+    batch_p.add_argument(
+        "--stop-on-error", action="store_true",
+        help="Send steps one at a time and stop at the first error",
+    )
+    batch_p.set_defaults(func=cmd_batch)
+
+    # crawl
+    crawl_p = subparsers.add_parser(
+        "crawl", parents=[block_opts, wait_opts], help="Load many URLs in parallel, one JSONL result per page",
+    )
+    crawl_p.add_argument("file", help="File with one URL per line ('-' for stdin)")
+    crawl_p.add_argument(
+        "--extract", action="append", choices=CRAWL_EXTRACTS,
+        help="What to return per page; repeatable (default: text)",
+    )
+    crawl_p.add_argument(
+        "--concurrency", "-c", type=int, default=DEFAULT_CRAWL_CONCURRENCY,
+        help=f"Pages loading at once (default: {DEFAULT_CRAWL_CONCURRENCY})",
+    )
+    crawl_p.add_argument(
+        "--per-host", type=int, default=DEFAULT_CRAWL_PER_HOST,
+        help=f"Pages loading at once from one host (default: {DEFAULT_CRAWL_PER_HOST})",
+    )
+    crawl_p.add_argument(
+        "--retries", type=int, default=CRAWL_RETRIES,
+        help=f"Extra attempts after an error, HTTP 429 or 5xx (default: {CRAWL_RETRIES})",
+    )
+    crawl_p.add_argument(
+        "--max-chars", type=int, default=CRAWL_MAX_CHARS, help=f"Text kept per page (default: {CRAWL_MAX_CHARS})",
+    )
+    crawl_p.add_argument("--context", help="Named context to crawl in (default: a fresh one)")
+    crawl_p.add_argument("--format", choices=IMAGE_FORMATS, default="png", help="Screenshot format")
+    crawl_p.add_argument("--output-dir", help="Write screenshots here instead of the capture dir")
+    crawl_p.set_defaults(func=cmd_crawl)
+
+    # stats
+    stats_p = subparsers.add_parser("stats", help="Per-action latency and error metrics")
+    stats_p.add_argument("--json", action="store_true", help="Print the raw response")
+    stats_p.add_argument("--reset", action="store_true", help="Start counting afresh after this")
+    stats_p.set_defaults(func=cmd_stats)
+
+    # bench
+    bench_p = subparsers.add_parser("bench", help="Measure CLI startup and round-trip latency")
+    bench_p.add_argument("-n", type=int, default=20, help="Samples per measurement (default: 20)")
+    bench_p.set_defaults(func=cmd_bench)
+
     args = parser.parse_args()
     args.func(args)
 
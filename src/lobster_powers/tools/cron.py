@@ -2,156 +2,1474 @@
 """
 lp-cron: Schedule reminders and recurring tasks.
 
-Uses system `at` for one-time and `crontab` for recurring jobs.
+Uses system `at` for one-time and `crontab` for recurring jobs, or the
+built-in scheduler when `lp-cron daemon` is running.
 
 Examples:
     lp-cron add "Check PRs" --at "9:00 tomorrow"
     lp-cron add "Weekly sync" --cron "0 10 * * 1"
+    lp-cron add "Reindex notes" --cron "0 * * * *" --exec "lp-memory index ~/notes" --timeout 600
     lp-cron list
+    lp-cron list --upcoming 24h
     lp-cron remove <job-id>
+    lp-cron remove --match "standup"
     lp-cron run <job-id>
+    lp-cron history [job-id]
+    lp-cron import jobs.jsonl
+    lp-cron export > jobs.jsonl
+    lp-cron daemon --spread 300
+    lp-cron status
 """
 
 import argparse
+import asyncio
+import heapq
 import json
+import math
 import os
+import re
+import shlex
+import signal
+import sqlite3
 import subprocess
 import sys
-from datetime import datetime
+import time
+import zlib
+from collections import deque
+from contextlib import contextmanager
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 
-JOBS_FILE = Path.home() / ".local" / "share" / "lobster-powers" / "cron-jobs.json"
+DATA_DIR = Path.home() / ".local" / "share" / "lobster-powers"
+DB_PATH = DATA_DIR / "cron.db"
+JOBS_FILE = DATA_DIR / "cron-jobs.json"  # Legacy store, migrated into DB_PATH
+DAEMON_STATE_FILE = DATA_DIR / "cron-daemon.json"
+BUSY_TIMEOUT = 30  # seconds to wait for another lp-cron holding the write lock
+RELOAD_INTERVAL = 1.0  # seconds between daemon checks for store changes
+DEFAULT_MAX_WORKERS = 8  # jobs the daemon runs at once, across all jobs
+QUEUE_LIMIT = 10  # queued runs per job under the "queue" overlap policy
+OUTPUT_TAIL = 2000  # chars of job output kept per run
+HISTORY_LIMIT = 500  # runs kept per job
+OVERLAP_POLICIES = ("skip", "queue", "kill")
+CATCHUP_POLICIES = ("once", "all", "skip")
+MISSED_GRACE = 60  # seconds late before a firing counts as missed
+CATCHUP_LIMIT = 100  # latest missed firings replayed per job under the "all" policy
+DEFAULT_COALESCE = 2.0  # seconds the daemon gathers due reminders into one notification
+COALESCE_LINES = 10  # reminders listed in a summary notification
 
+# Columns added after the first schema; ALTERed into older databases
+JOB_COLUMNS = {
+    "backend": "TEXT NOT NULL DEFAULT 'system'",  # 'system' (at/crontab) | 'daemon'
+    "run_at": "REAL",  # absolute fire time of daemon-owned one-shot jobs
+    "next_run": "REAL",  # cached next fire time, backs `list --upcoming`
+    "action": "TEXT NOT NULL DEFAULT 'notify'",  # 'notify' | 'exec'
+    "command": "TEXT",  # shell command of exec jobs
+    "timeout": "REAL",  # seconds before an exec run is killed
+    "max_concurrency": "INTEGER NOT NULL DEFAULT 1",  # parallel runs of one job
+    "overlap": "TEXT NOT NULL DEFAULT 'skip'",  # policy when max_concurrency is reached
+    "jitter": "REAL",  # window in seconds for the job's fixed start delay
+    "catchup": "TEXT NOT NULL DEFAULT 'once'",  # policy for firings missed while down
+}
 
-def load_jobs() -> dict:
-    """Load jobs from storage."""
-    if not JOBS_FILE.exists():
-        return {"jobs": [], "next_id": 1}
-    return json.loads(JOBS_FILE.read_text())
+CRON_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7),  # 0 and 7 are both Sunday
+)
+CRON_NAMES = {
+    "month": {n: i for i, n in enumerate(
+        ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)},
+    "weekday": {n: i for i, n in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])},
+}
+CRON_MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+AT_UNITS = {"min": 60, "minute": 60, "hour": 3600, "day": 86400, "week": 604800}
+AT_WORDS = {"noon": (12, 0), "midnight": (0, 0), "teatime": (16, 0)}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
 
 
-def save_jobs(data: dict) -> None:
-    """Save jobs to storage."""
-    JOBS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    JOBS_FILE.write_text(json.dumps(data, indent=2))
+class ScheduleError(Exception):
+    """Raised when a job cannot be handed to the system scheduler."""
 
 
-def cmd_add(args) -> None:
-    """Add a new job."""
-    data = load_jobs()
-    job_id = data["next_id"]
-    data["next_id"] += 1
+def get_db() -> sqlite3.Connection:
+    """Get database connection, creating schema and migrating if needed."""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Autocommit mode: write paths open explicit transactions via transaction()
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type TEXT NOT NULL,
+            text TEXT NOT NULL,
+            schedule TEXT NOT NULL,
+            created TEXT NOT NULL,
+            at_job_id TEXT,
+            enabled INTEGER NOT NULL DEFAULT 1,
+            backend TEXT NOT NULL DEFAULT 'system',
+            run_at REAL,
+            next_run REAL,
+            action TEXT NOT NULL DEFAULT 'notify',
+            command TEXT,
+            timeout REAL,
+            max_concurrency INTEGER NOT NULL DEFAULT 1,
+            overlap TEXT NOT NULL DEFAULT 'skip',
+            jitter REAL,
+            catchup TEXT NOT NULL DEFAULT 'once'
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_jobs_type ON jobs(type);
+
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER NOT NULL,
+            scheduled REAL,  -- due time; NULL for manual runs
+            started REAL NOT NULL,
+            finished REAL NOT NULL,
+            status TEXT NOT NULL,  -- 'ok' | 'failed' | 'timeout' | 'killed' | 'skipped' | 'missed'
+            exit_code INTEGER,
+            output TEXT  -- tail of combined stdout/stderr
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_runs_job ON runs(job_id, id);
+    """)
+
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+    if not columns.issuperset(JOB_COLUMNS):
+        upgrade_schema(conn)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_next_run ON jobs(next_run)")
+
+    if JOBS_FILE.exists():
+        migrate_json(conn)
+
+    return conn
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection):
+    """Run a block inside a write-locked transaction.
+
+    BEGIN IMMEDIATE takes the database write lock up front, so concurrent
+    lp-cron processes queue behind each other instead of interleaving.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def upgrade_schema(conn: sqlite3.Connection) -> None:
+    """Add columns introduced since the database was created."""
+    with transaction(conn):
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for name, ddl in JOB_COLUMNS.items():
+            if name not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {ddl}")
+
+
+def migrate_json(conn: sqlite3.Connection) -> None:
+    """One-time import of the legacy cron-jobs.json store."""
+    with transaction(conn):
+        # Another process may have finished the migration while we waited
+        try:
+            data = json.loads(JOBS_FILE.read_text())
+        except FileNotFoundError:
+            return
+        for job in data.get("jobs", []):
+            conn.execute(
+                "INSERT OR IGNORE INTO jobs (id, type, text, schedule, created, at_job_id, enabled) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job["id"], job["type"], job["text"], job["schedule"],
+                    job.get("created") or datetime.now().isoformat(),
+                    job.get("at_job_id"), int(job.get("enabled", True)),
+                ),
+            )
+
+        # Keep handing out ids above the legacy next_id counter
+        last_id = data.get("next_id", 1) - 1
+        updated = conn.execute(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'jobs'", (last_id,)
+        ).rowcount
+        if not updated and last_id > 0:
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('jobs', ?)", (last_id,))
+
+    # Renamed only once the rows are committed, so nobody sees the file gone
+    # before the jobs are readable. Rows are inserted with INSERT OR IGNORE:
+    # a crash before this, or a second process that started together and
+    # re-ran the migration, is harmless; the loser of the rename skips it.
+    try:
+        JOBS_FILE.rename(JOBS_FILE.with_suffix(".json.migrated"))
+    except FileNotFoundError:
+        pass
+
+
+def get_job(conn: sqlite3.Connection, job_id: int) -> dict | None:
+    """Look up a single job by id."""
+    row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def list_jobs(conn: sqlite3.Connection, job_type: str | None = None) -> list[dict]:
+    """List jobs ordered by id, optionally filtered by type."""
+    if job_type:
+        rows = conn.execute("SELECT * FROM jobs WHERE type = ? ORDER BY id", (job_type,))
+    else:
+        rows = conn.execute("SELECT * FROM jobs ORDER BY id")
+    return [dict(row) for row in rows]
+
+
+# Schedule parsing
+
+def parse_cron(expr: str) -> dict:
+    """Parse a 5-field cron expression into per-field bitmasks.
+
+    Bit N of a field's mask is set when value N matches, so evaluating a
+    candidate time is a handful of shifts instead of set lookups.
+    """
+    expr = CRON_MACROS.get(expr.strip().lower(), expr)
+    parts = expr.split()
+    if len(parts) != len(CRON_FIELDS):
+        raise ValueError(f"cron expression needs 5 fields, got {len(parts)}: {expr!r}")
+
+    spec = {}
+    for part, (name, low, high) in zip(parts, CRON_FIELDS):
+        spec[name] = parse_cron_field(part, name, low, high)
+
+    # Fold Sunday-as-7 onto 0
+    if spec["weekday"] & (1 << 7):
+        spec["weekday"] = (spec["weekday"] | 1) & ~(1 << 7)
+
+    # Like Vixie cron: when both day fields are restricted, either one matches
+    spec["day_or_weekday"] = not parts[2].startswith("*") and not parts[4].startswith("*")
+    return spec
+
+
+def parse_cron_field(field: str, name: str, low: int, high: int) -> int:
+    """Parse one cron field (lists, ranges, steps, names) into a bitmask."""
+    names = CRON_NAMES.get(name, {})
+
+    def value(token: str) -> int:
+        token = token.lower()
+        if token in names:
+            return names[token]
+        if not token.isdigit():
+            raise ValueError(f"invalid {name} value: {token!r}")
+        return int(token)
+
+    mask = 0
+    for item in field.split(","):
+        span, _, step_text = item.partition("/")
+        if step_text and not (step_text.isdigit() and int(step_text) > 0):
+            raise ValueError(f"invalid {name} step: {item!r}")
+        step = int(step_text) if step_text else 1
+
+        if span == "*":
+            start, end = low, high
+        else:
+            first, _, last = span.partition("-")
+            start = value(first)
+            # "5/15" means "from 5 to the end, every 15"
+            end = value(last) if last else (high if step_text else start)
+
+        if not low <= start <= end <= high:
+            raise ValueError(f"{name} out of range {low}-{high}: {item!r}")
+        for v in range(start, end + 1, step):
+            mask |= 1 << v
+    return mask
+
+
+def next_bit(mask: int, start: int) -> int | None:
+    """Return the lowest set bit of mask at or above start."""
+    rest = mask >> start
+    if not rest:
+        return None
+    return start + (rest & -rest).bit_length() - 1
+
+
+@lru_cache(maxsize=4096)
+def month_day_mask(day: int, weekday: int, day_or_weekday: bool, year: int, month: int) -> int:
+    """Combine the day-of-month and day-of-week masks for one month.
+
+    Bit N is set when day N of that month matches, so finding the next
+    matching day is a single next_bit() call.
+    """
+    first = date(year, month, 1).isoweekday() % 7  # cron weekday of the 1st
+    # Rotate so bit k means "weekday of day k+1 matches", then tile to 5 weeks
+    week = ((weekday >> first) | (weekday << (7 - first))) & 0x7F
+    by_weekday = 0
+    for shift in range(0, 35, 7):
+        by_weekday |= week << shift
+    by_weekday <<= 1
+
+    days = (day | by_weekday) if day_or_weekday else (day & by_weekday)
+    return days & ((1 << (monthrange(year, month)[1] + 1)) - 2)
+
+
+def next_cron_time(spec: dict, after: datetime) -> datetime | None:
+    """Return the first minute strictly after `after` matching a parsed spec.
+
+    Every field is a next_bit() jump over a bitmask (days via a cached
+    per-month mask), so a result takes a handful of iterations. Returns
+    None when nothing matches within 5 years (e.g. "0 0 30 2 *").
+    """
+    t = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    horizon = t.year + 5
+
+    while t.year <= horizon:
+        month = next_bit(spec["month"], t.month)
+        if month is None:
+            t = datetime(t.year + 1, 1, 1)
+            continue
+        if month != t.month:
+            t = datetime(t.year, month, 1)
+
+        days = month_day_mask(spec["day"], spec["weekday"], spec["day_or_weekday"], t.year, t.month)
+        day = next_bit(days, t.day)
+        if day is None:
+            t = datetime(t.year + t.month // 12, t.month % 12 + 1, 1)
+            continue
+        if day != t.day:
+            t = t.replace(day=day, hour=0, minute=0)
+
+        hour = next_bit(spec["hour"], t.hour)
+        if hour is None:
+            t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            continue
+        if hour != t.hour:
+            t = t.replace(hour=hour, minute=0)
+
+        minute = next_bit(spec["minute"], t.minute)
+        if minute is None:
+            t = t.replace(minute=0) + timedelta(hours=1)
+            continue
+        return t.replace(minute=minute)
+
+    return None
+
+
+def parse_duration(text: str) -> timedelta:
+    """Parse a duration like "90m", "24h", "7d" or "2w"."""
+    m = re.fullmatch(r"(\d+)\s*([smhdw])", text.strip().lower())
+    if not m:
+        raise ValueError(f"invalid duration: {text!r} (use e.g. 30m, 24h, 7d)")
+    unit = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}[m[2]]
+    return timedelta(seconds=int(m[1]) * unit)
+
+
+def next_run_time(job: dict, now: datetime) -> float | None:
+    """Compute the epoch time a job fires next, or None if unknown/past."""
+    if job["type"] == "cron":
+        next_time = next_cron_time(parse_cron(job["schedule"]), now)
+        return next_time.timestamp() if next_time else None
+    if job.get("run_at") is not None:
+        return job["run_at"]
+    try:
+        return parse_at(job["schedule"], datetime.fromisoformat(job["created"])).timestamp()
+    except ValueError:
+        return None  # at understands more formats than we do
+
+
+def jitter_offset(job_id: int, window: float | None) -> float:
+    """Fixed start delay of a job within its jitter window.
+
+    Derived from the job id, so a job keeps its slot from run to run while
+    jobs sharing a schedule spread evenly across the window.
+    """
+    if not window:
+        return 0.0
+    return zlib.crc32(f"lp-cron-{job_id}".encode()) / 2**32 * window
+
+
+def parse_at(spec: str, now: datetime) -> datetime:
+    """Resolve an `at`-style time spec relative to now.
+
+    Supports the forms the skill documents: "now + 30 minutes", "9:00",
+    "5pm", "noon", optionally followed by "today", "tomorrow", a weekday
+    or a YYYY-MM-DD date, plus plain ISO timestamps.
+    """
+    text = " ".join(spec.lower().split())
+
+    try:
+        return datetime.fromisoformat(spec.strip())
+    except ValueError:
+        pass
+
+    m = re.fullmatch(r"now(?: ?\+ ?(\d+) ?(min|minute|hour|day|week)s?)?", text)
+    if m:
+        return now + timedelta(seconds=int(m[1]) * AT_UNITS[m[2]]) if m[1] else now
+
+    m = re.fullmatch(
+        r"(?P<time>noon|midnight|teatime|\d{1,2}(?::\d{2})? ?(?:am|pm)?|\d{4})(?: (?P<day>.+))?",
+        text,
+    )
+    if not m:
+        raise ValueError(f"unrecognized time: {spec!r}")
+
+    clock = m["time"].replace(" ", "")
+    if clock in AT_WORDS:
+        hour, minute = AT_WORDS[clock]
+    else:
+        suffix = clock[-2:] if clock.endswith(("am", "pm")) else ""
+        digits = clock[:-2] if suffix else clock
+        if ":" in digits:
+            hour, minute = (int(x) for x in digits.split(":"))
+        elif len(digits) == 4:
+            hour, minute = int(digits[:2]), int(digits[2:])
+        else:
+            hour, minute = int(digits), 0
+        if suffix:
+            if not 1 <= hour <= 12:
+                raise ValueError(f"invalid hour: {spec!r}")
+            hour = hour % 12 + (12 if suffix == "pm" else 0)
+    if hour > 23 or minute > 59:
+        raise ValueError(f"invalid time of day: {spec!r}")
+
+    day = m["day"]
+    result = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if day is None:
+        if result <= now:
+            result += timedelta(days=1)
+    elif day == "today":
+        pass
+    elif day == "tomorrow":
+        result += timedelta(days=1)
+    elif len(day) >= 3 and any(w.startswith(day) for w in WEEKDAYS):
+        target = next(i for i, w in enumerate(WEEKDAYS) if w.startswith(day))
+        ahead = (target - now.weekday()) % 7
+        if ahead == 0 and result <= now:
+            ahead = 7
+        result += timedelta(days=ahead)
+    else:
+        try:
+            date = datetime.strptime(day, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"unrecognized date: {day!r}")
+        result = result.replace(year=date.year, month=date.month, day=date.day)
+    return result
+
+
+# System scheduler (at / crontab)
+
+def job_command(job: dict) -> str:
+    """Build the shell command at/crontab runs for a job."""
+    delay = int(jitter_offset(job["id"], job.get("jitter")))
+    prefix = f"sleep {delay}; " if delay else ""
+    if job["action"] == "exec":
+        # Go through `lp-cron run` so timeouts and run history still apply
+        return (
+            f"{prefix}{shlex.quote(sys.executable)} -m lobster_powers.tools.cron run --scheduled {job['id']}"
+            " >/dev/null 2>&1"
+        )
+    return f'{prefix}notify-send "🦞 Reminder" "{job["text"]}"'
+
+
+def schedule_at(job: dict) -> str | None:
+    """Queue a one-time job with `at`, returning the at job id."""
+    try:
+        proc = subprocess.run(
+            ["at", job["schedule"]],
+            input=job_command(job),
+            text=True,
+            capture_output=True,
+        )
+    except FileNotFoundError:
+        raise ScheduleError("'at' command not found. Install with: sudo apt install at")
+    if proc.returncode != 0:
+        raise ScheduleError(f"scheduling with at failed: {proc.stderr}")
+    return proc.stderr.split()[1] if proc.stderr else None
+
+
+def read_crontab() -> list[str]:
+    """Read the user crontab as a list of lines (empty if none)."""
+    result = subprocess.run(["crontab", "-l"], capture_output=True, text=True)
+    return result.stdout.splitlines() if result.returncode == 0 else []
+
+
+def write_crontab(lines: list[str]) -> None:
+    """Replace the user crontab."""
+    subprocess.run(["crontab", "-"], input="\n".join(lines) + "\n", text=True, check=True)
+
+
+def crontab_job_id(line: str) -> int | None:
+    """Return the lp-cron job id a crontab line belongs to, if any."""
+    m = re.search(r"# lp-cron-(\d+)$", line)
+    return int(m[1]) if m else None
+
+
+def cron_line(job: dict) -> str:
+    """Build the crontab line for a recurring job."""
+    return f"{job['schedule']} {job_command(job)} # lp-cron-{job['id']}"
+
+
+def schedule_cron(lines: list[str]) -> None:
+    """Append recurring job lines to the user crontab in a single rewrite."""
+    try:
+        write_crontab(read_crontab() + lines)
+    except Exception as e:
+        raise ScheduleError(f"adding to crontab failed: {e}")
+
+
+def unschedule_cron(job_ids: set[int]) -> None:
+    """Drop the crontab lines of the given jobs in a single rewrite."""
+    try:
+        lines = read_crontab()
+        kept = [line for line in lines if crontab_job_id(line) not in job_ids]
+        if len(kept) != len(lines):
+            write_crontab(kept)
+    except Exception:
+        pass
+
+
+# Job changes
+
+def new_job(
+    text: str,
+    job_type: str,
+    schedule: str,
+    backend: str,
+    command: str | None = None,
+    timeout: float | None = None,
+    max_concurrency: int = 1,
+    overlap: str = "skip",
+    jitter: float | None = None,
+    catchup: str = "once",
+) -> dict:
+    """Build a job row, validating its schedule and options up front.
+
+    A job with a command runs it (action "exec"); otherwise it sends a
+    desktop notification with its text.
+    """
+    now = datetime.now()
+    run_at = None
+    if job_type == "cron":
+        if next_cron_time(parse_cron(schedule), now) is None:
+            raise ValueError(f"cron expression never fires: {schedule!r}")
+    elif backend == "daemon":
+        run_at = parse_at(schedule, now).timestamp()
+
+    if overlap not in OVERLAP_POLICIES:
+        raise ValueError(f"overlap must be one of {', '.join(OVERLAP_POLICIES)}")
+    if max_concurrency < 1:
+        raise ValueError("max concurrency must be at least 1")
+    if timeout is not None and timeout <= 0:
+        raise ValueError("timeout must be positive")
+    if jitter is not None and jitter < 0:
+        raise ValueError("jitter must not be negative")
+    if catchup not in CATCHUP_POLICIES:
+        raise ValueError(f"catchup must be one of {', '.join(CATCHUP_POLICIES)}")
 
     job = {
-        "id": job_id,
-        "text": args.text,
-        "created": datetime.now().isoformat(),
+        "type": job_type,
+        "text": text,
+        "schedule": schedule,
+        "created": now.isoformat(),
+        "backend": backend,
+        "run_at": run_at,
+        "action": "exec" if command else "notify",
+        "command": command,
+        "timeout": timeout,
+        "max_concurrency": max_concurrency,
+        "overlap": overlap,
+        "jitter": jitter,
+        "catchup": catchup,
     }
+    job["next_run"] = next_run_time(job, now)
+    return job
 
-    if args.at:
-        # One-time job using `at`
-        job["type"] = "at"
-        job["schedule"] = args.at
 
-        # Create notification command
-        notify_cmd = f'notify-send "🦞 Reminder" "{args.text}"'
+def insert_jobs(conn: sqlite3.Connection, jobs: list[dict]) -> None:
+    """Store jobs and register system ones; call inside transaction().
+
+    Ids are filled into the dicts. All new crontab lines are written in
+    one rewrite; `at` has no batch mode, so one-shots still queue singly.
+    If any scheduling fails, the `at` jobs already queued are removed
+    again, so the rolled-back rows leave nothing behind in atd.
+    """
+    fields = [
+        "type", "text", "schedule", "created", "backend", "run_at", "next_run",
+        "action", "command", "timeout", "max_concurrency", "overlap", "jitter", "catchup",
+    ]
+    sql = f"INSERT INTO jobs ({', '.join(fields)}) VALUES ({', '.join('?' * len(fields))})"
+
+    cron_lines = []
+    queued = []
+    try:
+        for job in jobs:
+            job["id"] = conn.execute(sql, [job[f] for f in fields]).lastrowid
+
+            if job["backend"] == "daemon":
+                continue  # Picked up by the daemon's next reload
+            if job["type"] == "at":
+                job["at_job_id"] = schedule_at(job)
+                if job["at_job_id"]:
+                    queued.append(job["at_job_id"])
+                conn.execute("UPDATE jobs SET at_job_id = ? WHERE id = ?", (job["at_job_id"], job["id"]))
+            else:
+                cron_lines.append(cron_line(job))
+
+        if cron_lines:
+            schedule_cron(cron_lines)
+    except BaseException:
+        for at_job_id in queued:
+            subprocess.run(["atrm", str(at_job_id)], capture_output=True)
+        raise
+
+
+def delete_jobs(conn: sqlite3.Connection, jobs: list[dict]) -> None:
+    """Delete jobs and unregister system ones; call inside transaction()."""
+    cron_ids = set()
+    for job in jobs:
+        if job["backend"] == "daemon":
+            continue  # The daemon drops it on its next reload
+        if job["type"] == "at" and job.get("at_job_id"):
+            subprocess.run(["atrm", str(job["at_job_id"])], capture_output=True)
+        elif job["type"] == "cron":
+            cron_ids.add(job["id"])
+
+    if cron_ids:
+        unschedule_cron(cron_ids)
+    conn.executemany("DELETE FROM jobs WHERE id = ?", [(job["id"],) for job in jobs])
 
+
+def refresh_next_runs(conn: sqlite3.Connection) -> None:
+    """Recompute cached next_run for recurring jobs whose value has passed.
+
+    The daemon advances next_run as it fires, and a past value on a daemon
+    job marks runs it missed, so those are left for it to catch up.
+    Crontab-driven jobs are brought up to date lazily here, so only stale
+    rows cost anything.
+    """
+    now = datetime.now()
+    stale = conn.execute(
+        "SELECT * FROM jobs WHERE type = 'cron' AND backend = 'system' "
+        "AND (next_run IS NULL OR next_run <= ?)",
+        (now.timestamp(),),
+    ).fetchall()
+    if not stale:
+        return
+
+    updates = []
+    for row in stale:
         try:
-            proc = subprocess.run(
-                ["at", args.at],
-                input=notify_cmd,
-                text=True,
-                capture_output=True,
+            updates.append((next_run_time(dict(row), now), row["id"]))
+        except ValueError:
+            continue
+    with transaction(conn):
+        conn.executemany("UPDATE jobs SET next_run = ? WHERE id = ?", updates)
+
+
+def job_key(job: dict) -> tuple:
+    """Identity used to spot duplicate jobs on import."""
+    return (job["type"], job["schedule"], job["text"], job["command"])
+
+
+def format_change(sign: str, job: dict) -> str:
+    """Format one diff-style summary line."""
+    job_id = f"#{job['id']} " if job.get("id") else ""
+    return f"{sign} {job_id}[{job['type']}] {job['text']} ({job['schedule']})"
+
+
+# Job execution
+
+def record_runs(conn: sqlite3.Connection, runs: list[tuple]) -> None:
+    """Store finished runs and trim each job's history to HISTORY_LIMIT.
+
+    Each run is (job_id, scheduled, started, finished, status, exit_code, output).
+    """
+    with transaction(conn):
+        conn.executemany(
+            "INSERT INTO runs (job_id, scheduled, started, finished, status, exit_code, output) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            runs,
+        )
+        for job_id in {run[0] for run in runs}:
+            conn.execute(
+                "DELETE FROM runs WHERE job_id = ? AND id <= "
+                "(SELECT id FROM runs WHERE job_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (job_id, job_id, HISTORY_LIMIT),
             )
-            if proc.returncode != 0:
-                print(f"Error scheduling with at: {proc.stderr}", file=sys.stderr)
+
+
+def run_job(job: dict, scheduled: float | None = None) -> tuple:
+    """Run a job synchronously and return its run record."""
+    from lobster_powers.tools.notify import notify
+
+    started = time.time()
+    if job["action"] != "exec":
+        ok = notify(job["text"], "🦞 Reminder")
+        return (job["id"], scheduled, started, time.time(), "ok" if ok else "failed", None, None)
+
+    try:
+        proc = subprocess.run(
+            job["command"],
+            shell=True,
+            capture_output=True,
+            text=True,
+            errors="replace",
+            timeout=job["timeout"],
+        )
+        status = "ok" if proc.returncode == 0 else "failed"
+        exit_code, output = proc.returncode, proc.stdout + proc.stderr
+    except subprocess.TimeoutExpired as e:
+        status, exit_code = "timeout", None
+        output = e.output.decode(errors="replace") if isinstance(e.output, bytes) else (e.output or "")
+
+    return (job["id"], scheduled, started, time.time(), status, exit_code, output[-OUTPUT_TAIL:])
+
+
+async def run_job_async(job: dict, procs: set) -> tuple[str, int | None, str]:
+    """Run a job inside the daemon, returning (status, exit_code, output tail).
+
+    Exec jobs get their own process group so timeouts and the "kill"
+    overlap policy take down everything they spawned.
+    """
+    from lobster_powers.tools.notify import notify
+
+    if job["action"] != "exec":
+        ok = await asyncio.to_thread(notify, job["text"], "🦞 Reminder")
+        return ("ok" if ok else "failed"), None, ""
+
+    proc = await asyncio.create_subprocess_shell(
+        job["command"],
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        start_new_session=True,
+    )
+    procs.add(proc)
+    tail = bytearray()
+
+    async def collect() -> None:
+        while chunk := await proc.stdout.read(4096):
+            tail.extend(chunk)
+            del tail[:-OUTPUT_TAIL * 4]
+
+    try:
+        await asyncio.wait_for(asyncio.gather(collect(), proc.wait()), timeout=job["timeout"])
+        status = "ok" if proc.returncode == 0 else "failed"
+        if proc.returncode < 0:
+            status = "killed"
+    except asyncio.TimeoutError:
+        kill_process_group(proc)
+        await proc.wait()
+        status = "timeout"
+    finally:
+        procs.discard(proc)
+
+    output = tail.decode(errors="replace")[-OUTPUT_TAIL:]
+    return status, proc.returncode, output
+
+
+def kill_process_group(proc) -> None:
+    """Kill a job process and everything it started."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a sorted list."""
+    return values[max(math.ceil(pct / 100 * len(values)) - 1, 0)]
+
+
+# Scheduler daemon
+
+def load_daemon_state() -> dict | None:
+    """Load daemon state."""
+    if not DAEMON_STATE_FILE.exists():
+        return None
+    try:
+        return json.loads(DAEMON_STATE_FILE.read_text())
+    except Exception:
+        return None
+
+
+def is_daemon_running() -> bool:
+    """Check if the scheduler daemon is running."""
+    state = load_daemon_state()
+    if not state or not state.get("pid"):
+        return False
+    try:
+        os.kill(state["pid"], 0)
+        return True
+    except OSError:
+        DAEMON_STATE_FILE.unlink(missing_ok=True)
+        return False
+
+
+def adopt_system_jobs(conn: sqlite3.Connection) -> int:
+    """Move at/crontab jobs under the daemon so nothing fires twice."""
+    now = datetime.now()
+    adopted_cron = set()
+    adopted = 0
+
+    with transaction(conn):
+        for job in conn.execute("SELECT * FROM jobs WHERE backend = 'system'").fetchall():
+            try:
+                if job["type"] == "at":
+                    run_at = parse_at(job["schedule"], datetime.fromisoformat(job["created"]))
+                else:
+                    parse_cron(job["schedule"])
+            except ValueError:
+                continue  # Leave schedules we can't evaluate with at/crontab
+
+            if job["type"] == "at":
+                if job["at_job_id"]:
+                    subprocess.run(["atrm", str(job["at_job_id"])], capture_output=True)
+                if run_at <= now:
+                    # Already fired by atd, so the one-shot is done
+                    conn.execute("DELETE FROM jobs WHERE id = ?", (job["id"],))
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET backend = 'daemon', run_at = ?, next_run = ?, at_job_id = NULL "
+                    "WHERE id = ?",
+                    (run_at.timestamp(), run_at.timestamp(), job["id"]),
+                )
+            else:
+                # crontab has taken care of everything up to now
+                adopted_cron.add(job["id"])
+                conn.execute(
+                    "UPDATE jobs SET backend = 'daemon', next_run = ? WHERE id = ?",
+                    (next_run_time(dict(job), now), job["id"]),
+                )
+            adopted += 1
+
+        if adopted_cron:
+            unschedule_cron(adopted_cron)
+
+    return adopted
+
+
+def first_fire_time(job: dict, spec: dict | None) -> float | None:
+    """Return the nominal time a daemon job fires next.
+
+    A stored next_run in the past means the daemon was down when the job
+    was due; it is returned as is so the catch-up policy can deal with it.
+    """
+    if job["type"] == "at":
+        return job["run_at"]
+    if job["next_run"] is not None:
+        return job["next_run"]
+    next_time = next_cron_time(spec, datetime.now())
+    return next_time.timestamp() if next_time else None
+
+
+def missed_firings(job: dict, spec: dict | None, due: float, now: float) -> list[float]:
+    """List the nominal times a job was due between `due` and now.
+
+    Walks the whole gap but keeps only the latest HISTORY_LIMIT times, as
+    many as the job's history could show anyway.
+    """
+    missed = deque([due], maxlen=HISTORY_LIMIT)
+    if spec is None:
+        return list(missed)
+    after = datetime.fromtimestamp(due)
+    while (next_time := next_cron_time(spec, after)) and next_time.timestamp() <= now:
+        missed.append(next_time.timestamp())
+        after = next_time
+    return list(missed)
+
+
+def summarize_reminders(texts: list[str]) -> str:
+    """Build the body of one notification standing in for many reminders."""
+    lines = [f"• {text}" for text in texts[:COALESCE_LINES]]
+    if len(texts) > COALESCE_LINES:
+        lines.append(f"… and {len(texts) - COALESCE_LINES} more")
+    return "\n".join(lines)
+
+
+async def run_scheduler(
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    spread: float = 0.0,
+    coalesce: float = DEFAULT_COALESCE,
+) -> None:
+    """Run the scheduler daemon.
+
+    Pending firings sit in a min-heap of (fire_time, job_id, generation,
+    due), where due is the nominal schedule time and fire_time adds the
+    job's jitter offset (its own window, or `spread` for recurring jobs
+    without one). Edits bump a job's generation, so stale heap entries are
+    skipped when popped rather than searched for. The loop sleeps until the
+    earliest firing, waking at most every RELOAD_INTERVAL to check PRAGMA
+    data_version, which changes only when another connection commits.
+
+    A firing popped more than MISSED_GRACE late was missed (the daemon was
+    stopped or the machine slept) and is handled by the job's catch-up
+    policy. Reminders due within `coalesce` seconds of each other are
+    delivered as a single notification.
+
+    Due jobs run as tasks gated by a global worker semaphore and a
+    per-job one sized by max_concurrency; the job's overlap policy decides
+    what happens when its own slots are full.
+    """
+    from lobster_powers.tools.notify import notify
+
+    conn = get_db()
+    adopted = adopt_system_jobs(conn)
+
+    heap: list[tuple[float, int, int, float]] = []
+    entries: dict[int, dict] = {}  # job_id -> {"job", "spec", "key", "gen", "offset"}
+    job_state: dict[int, dict] = {}  # job_id -> {"slots", "procs", "queued"}
+    tasks: set[asyncio.Task] = set()
+    completed: list[tuple] = []  # finished runs awaiting one batched write
+    reminders: list[tuple[dict, float]] = []  # (job, scheduled) gathered for coalescing
+    flush_at = None  # when the gathered reminders go out
+    workers = asyncio.Semaphore(max_workers)
+    data_version = None
+
+    def reload_jobs() -> None:
+        seen = set()
+        for row in conn.execute("SELECT * FROM jobs WHERE backend = 'daemon' AND enabled = 1"):
+            job = dict(row)
+            seen.add(job["id"])
+            key = tuple(job[k] for k in (
+                "type", "schedule", "run_at", "text", "action", "command",
+                "timeout", "max_concurrency", "overlap", "jitter", "catchup",
+            ))
+            entry = entries.get(job["id"])
+            if entry and entry["key"] == key:
+                continue
+
+            try:
+                spec = parse_cron(job["schedule"]) if job["type"] == "cron" else None
+            except ValueError as e:
+                print(f"Skipping job #{job['id']}: {e}", file=sys.stderr)
+                continue
+
+            window = job["jitter"]
+            if window is None and job["type"] == "cron":
+                window = spread
+            gen = entry["gen"] + 1 if entry else 0
+            offset = jitter_offset(job["id"], window)
+            entries[job["id"]] = {"job": job, "spec": spec, "key": key, "gen": gen, "offset": offset}
+            due = first_fire_time(job, spec)
+            if due is not None:
+                heapq.heappush(heap, (due + offset, job["id"], gen, due))
+
+        for job_id in entries.keys() - seen:
+            del entries[job_id]
+            job_state.pop(job_id, None)  # Running tasks keep their own reference
+
+        # Drop stale entries once they outnumber live ones
+        if len(heap) > 2 * len(entries) + 64:
+            heap[:] = [e for e in heap if e[1] in entries and entries[e[1]]["gen"] == e[2]]
+            heapq.heapify(heap)
+
+    async def execute(job: dict, scheduled: float) -> None:
+        state = job_state.get(job["id"])
+        if not state or state["limit"] != job["max_concurrency"]:
+            state = {
+                "slots": asyncio.Semaphore(job["max_concurrency"]),
+                "limit": job["max_concurrency"],
+                "procs": set(),
+                "queued": 0,
+            }
+            job_state[job["id"]] = state
+
+        if state["slots"].locked():
+            if job["overlap"] == "skip" or state["queued"] >= QUEUE_LIMIT:
+                now = time.time()
+                completed.append((job["id"], scheduled, now, now, "skipped", None, None))
                 return
-            job["at_job_id"] = proc.stderr.split()[1] if proc.stderr else None
-        except FileNotFoundError:
-            print("Error: 'at' command not found. Install with: sudo apt install at", file=sys.stderr)
+            if job["overlap"] == "kill":
+                for proc in list(state["procs"]):
+                    kill_process_group(proc)
+
+        state["queued"] += 1
+        try:
+            await state["slots"].acquire()
+        finally:
+            state["queued"] -= 1
+        try:
+            async with workers:
+                started = time.time()
+                try:
+                    status, exit_code, output = await run_job_async(job, state["procs"])
+                except Exception as e:
+                    status, exit_code, output = "failed", None, str(e)
+                completed.append((job["id"], scheduled, started, time.time(), status, exit_code, output))
+        finally:
+            state["slots"].release()
+
+    async def notify_many(batch: list[tuple[dict, float]]) -> None:
+        async with workers:
+            started = time.time()
+            ok = await asyncio.to_thread(
+                notify, summarize_reminders([job["text"] for job, _ in batch]),
+                f"🦞 {len(batch)} Reminders",
+            )
+            finished = time.time()
+        status = "ok" if ok else "failed"
+        completed.extend((job["id"], scheduled, started, finished, status, None, None) for job, scheduled in batch)
+
+    async def replay(job: dict, scheduled: list[float]) -> None:
+        # One at a time, so replays don't trip the job's own overlap policy
+        for when in scheduled:
+            await execute(job, when)
+
+    def start(coro) -> None:
+        task = asyncio.create_task(coro)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    def dispatch(job: dict, scheduled: float, now: float) -> None:
+        nonlocal flush_at
+        if job["action"] != "notify" or not coalesce:
+            start(execute(job, scheduled))
             return
+        if flush_at is None:
+            flush_at = now + coalesce
+        reminders.append((job, scheduled))
 
-    elif args.cron:
-        # Recurring job using crontab
-        job["type"] = "cron"
-        job["schedule"] = args.cron
+    def flush_reminders() -> None:
+        nonlocal flush_at
+        if len(reminders) == 1:
+            start(execute(*reminders[0]))
+        elif reminders:
+            start(notify_many(list(reminders)))
+        reminders.clear()
+        flush_at = None
 
-        notify_cmd = f'notify-send "🦞 Reminder" "{args.text}"'
-        cron_line = f'{args.cron} {notify_cmd} # lp-cron-{job_id}'
+    def fire(entry: dict, due: float, now: float, finished: list, advanced: list) -> None:
+        job, spec, offset = entry["job"], entry["spec"], entry["offset"]
 
-        # Add to crontab
-        try:
-            result = subprocess.run(["crontab", "-l"], capture_output=True, text=True)
-            existing = result.stdout if result.returncode == 0 else ""
-            new_crontab = existing.rstrip() + "\n" + cron_line + "\n"
-            subprocess.run(["crontab", "-"], input=new_crontab, text=True, check=True)
-        except Exception as e:
-            print(f"Error adding to crontab: {e}", file=sys.stderr)
+        if now - (due + offset) <= MISSED_GRACE:
+            dispatch(job, due + offset, now)
+        else:
+            missed = missed_firings(job, spec, due, now)
+            replayed = {"all": missed[-CATCHUP_LIMIT:], "once": missed[-1:], "skip": []}[job["catchup"]]
+            completed.extend(
+                (job["id"], t + offset, now, now, "missed", None, None)
+                for t in missed[:len(missed) - len(replayed)]
+            )
+            if job["action"] == "exec" and replayed:
+                start(replay(job, [t + offset for t in replayed]))
+            else:
+                for nominal in replayed:
+                    dispatch(job, nominal + offset, now)
+            due = max(missed[-1], now)  # Resume from the present, not from the gap
+
+        if job["type"] == "at":
+            del entries[job["id"]]
+            finished.append((job["id"],))
             return
 
+        next_time = next_cron_time(spec, datetime.fromtimestamp(due))
+        if next_time:
+            next_due = next_time.timestamp()
+            heapq.heappush(heap, (next_due + offset, job["id"], entry["gen"], next_due))
+        advanced.append((next_time.timestamp() if next_time else None, job["id"]))
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    DAEMON_STATE_FILE.write_text(json.dumps({"pid": os.getpid()}))
+    print(f"Scheduler daemon started (PID: {os.getpid()}, adopted {adopted} jobs)")
+
+    try:
+        while not stop.is_set():
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != data_version:
+                data_version = version
+                reload_jobs()
+
+            now = time.time()
+            finished, advanced = [], []
+            while heap and heap[0][0] <= now:
+                _, job_id, gen, due = heapq.heappop(heap)
+                entry = entries.get(job_id)
+                if entry and entry["gen"] == gen:
+                    fire(entry, due, now, finished, advanced)
+            if flush_at is not None and flush_at <= now:
+                flush_reminders()
+
+            # One write per wake-up, however many jobs fired
+            if finished or advanced:
+                with transaction(conn):
+                    conn.executemany("DELETE FROM jobs WHERE id = ?", finished)
+                    conn.executemany("UPDATE jobs SET next_run = ? WHERE id = ?", advanced)
+            if completed:
+                record_runs(conn, completed)
+                completed.clear()
+
+            # Wall-clock check each wake-up also notices a suspend
+            wake = min(heap[0][0] if heap else math.inf, flush_at or math.inf)
+            delay = min(RELOAD_INTERVAL, wake - now)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=max(delay, 0))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        flush_reminders()  # Their one-shot jobs are already gone from the store
+        for state in job_state.values():
+            for proc in list(state["procs"]):
+                kill_process_group(proc)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if completed:
+            record_runs(conn, completed)
+        DAEMON_STATE_FILE.unlink(missing_ok=True)
+        conn.close()
+
+
+# Commands
+
+def cmd_add(args) -> None:
+    """Add a new job."""
+    if args.at:
+        job_type, schedule = "at", args.at
+    elif args.cron:
+        job_type, schedule = "cron", args.cron
     else:
         print("Error: specify --at or --cron", file=sys.stderr)
         return
 
-    data["jobs"].append(job)
-    save_jobs(data)
-    print(f"Created job #{job_id}: {args.text}")
-    print(f"  Schedule: {job['schedule']} ({job['type']})")
+    # With the daemon up, jobs go straight to it instead of at/crontab
+    backend = "daemon" if is_daemon_running() else "system"
+    try:
+        job = new_job(
+            args.text, job_type, schedule, backend,
+            command=args.command,
+            timeout=args.timeout,
+            max_concurrency=args.max_concurrency,
+            overlap=args.overlap,
+            jitter=args.jitter,
+            catchup=args.catchup,
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return
+
+    conn = get_db()
+    try:
+        # The id is allocated and the system scheduler updated under one
+        # write lock, so parallel adds never share an id or clobber crontab.
+        with transaction(conn):
+            insert_jobs(conn, [job])
+    except ScheduleError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return
+
+    print(f"Created job #{job['id']}: {args.text}")
+    print(f"  Schedule: {schedule} ({job_type})")
+
+
+def format_when(timestamp: float, now: float) -> str:
+    """Format a fire time with a relative offset, e.g. "2026-02-01 09:00 (in 3h 5m)"."""
+    days, minutes = divmod(max(int(timestamp - now) // 60, 0), 1440)
+    hours, minutes = divmod(minutes, 60)
+    offset = " ".join(f"{n}{unit}" for n, unit in ((days, "d"), (hours, "h"), (minutes, "m")) if n)
+    return f"{datetime.fromtimestamp(timestamp):%Y-%m-%d %H:%M} (in {offset or '<1m'})"
 
 
 def cmd_list(args) -> None:
-    """List all jobs."""
-    data = load_jobs()
+    """List all jobs, or those firing within --upcoming."""
+    conn = get_db()
+    refresh_next_runs(conn)
+    now = time.time()
+
+    if args.upcoming:
+        try:
+            window = parse_duration(args.upcoming)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        # Served straight from the next_run index
+        query = "SELECT * FROM jobs WHERE enabled = 1 AND next_run > ? AND next_run <= ?"
+        params = [now, now + window.total_seconds()]
+        if args.type:
+            query += " AND type = ?"
+            params.append(args.type)
+        jobs = [dict(row) for row in conn.execute(query + " ORDER BY next_run", params)]
+
+        if not jobs:
+            print(f"Nothing scheduled in the next {args.upcoming}.")
+            return
+
+        print(f"Upcoming in the next {args.upcoming}:")
+        for job in jobs:
+            print(f"  {format_when(job['next_run'], now)}  #{job['id']} [{job['type']}] {job['text']}")
+        return
 
-    if not data["jobs"]:
+    jobs = list_jobs(conn, args.type)
+
+    if not jobs:
         print("No jobs scheduled.")
         return
 
     print("Scheduled jobs:")
-    for job in data["jobs"]:
+    for job in jobs:
         print(f"  #{job['id']} [{job['type']}] {job['text']}")
         print(f"      Schedule: {job['schedule']}")
+        if job["action"] == "exec":
+            print(f"      Runs: {job['command']}")
+        if job["next_run"] and job["next_run"] > now:
+            print(f"      Next run: {format_when(job['next_run'], now)}")
+        elif job["next_run"] and job["backend"] == "daemon":
+            missed = datetime.fromtimestamp(job["next_run"])
+            print(f"      Missed: {missed:%Y-%m-%d %H:%M} (catch-up: {job['catchup']} when the daemon runs)")
+        if job["jitter"]:
+            print(f"      Jitter: +{jitter_offset(job['id'], job['jitter']):.0f}s of {job['jitter']:g}s")
 
 
 def cmd_remove(args) -> None:
-    """Remove a job."""
-    data = load_jobs()
-    job = next((j for j in data["jobs"] if j["id"] == args.job_id), None)
+    """Remove one job, or every job matching --match/--all."""
+    if (args.job_id is not None) + bool(args.match) + args.all != 1:
+        print("Error: specify a job id, --match or --all", file=sys.stderr)
+        sys.exit(1)
 
-    if not job:
-        print(f"Job #{args.job_id} not found.", file=sys.stderr)
+    conn = get_db()
+    with transaction(conn):
+        if args.job_id is not None:
+            job = get_job(conn, args.job_id)
+            if not job:
+                print(f"Job #{args.job_id} not found.", file=sys.stderr)
+                return
+            jobs = [job]
+        else:
+            jobs = list_jobs(conn, args.type)
+            if args.match:
+                needle = args.match.lower()
+                jobs = [j for j in jobs if needle in j["text"].lower()]
+
+        if not args.dry_run:
+            delete_jobs(conn, jobs)
+
+    if args.job_id is not None:
+        print(f"Removed job #{args.job_id}")
         return
 
-    if job["type"] == "at" and job.get("at_job_id"):
-        subprocess.run(["atrm", str(job["at_job_id"])], capture_output=True)
+    for job in jobs:
+        print(format_change("-", job))
+    verb = "Would remove" if args.dry_run else "Removed"
+    print(f"{verb} {len(jobs)} jobs")
 
-    elif job["type"] == "cron":
-        # Remove from crontab
-        try:
-            result = subprocess.run(["crontab", "-l"], capture_output=True, text=True)
-            if result.returncode == 0:
-                marker = f"# lp-cron-{job['id']}"
-                lines = [l for l in result.stdout.splitlines() if marker not in l]
-                subprocess.run(["crontab", "-"], input="\n".join(lines) + "\n", text=True)
-        except Exception:
-            pass
 
-    data["jobs"] = [j for j in data["jobs"] if j["id"] != args.job_id]
-    save_jobs(data)
-    print(f"Removed job #{args.job_id}")
+def cmd_import(args) -> None:
+    """Add jobs from a JSONL file in one transaction."""
+    try:
+        source = sys.stdin if args.file == "-" else open(args.file)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    backend = "daemon" if is_daemon_running() else "system"
+
+    # Validate the whole file before touching anything
+    jobs, errors = [], []
+    with source:
+        for lineno, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                if "at" in entry:
+                    job_type, schedule = "at", entry["at"]
+                elif "cron" in entry:
+                    job_type, schedule = "cron", entry["cron"]
+                else:
+                    job_type, schedule = entry["type"], entry["schedule"]
+                if job_type not in ("at", "cron"):
+                    raise ValueError(f"unknown type {job_type!r}")
+                jobs.append(new_job(
+                    entry["text"], job_type, schedule, backend,
+                    command=entry.get("exec"),
+                    timeout=entry.get("timeout"),
+                    max_concurrency=entry.get("max_concurrency", 1),
+                    overlap=entry.get("overlap", "skip"),
+                    jitter=entry.get("jitter"),
+                    catchup=entry.get("catchup", "once"),
+                ))
+            except KeyError as e:
+                errors.append(f"line {lineno}: missing field {e}")
+            except (ValueError, TypeError) as e:
+                errors.append(f"line {lineno}: {e}")
+
+    if errors:
+        for error in errors:
+            print(f"Error: {error}", file=sys.stderr)
+        print("Nothing imported.", file=sys.stderr)
+        sys.exit(1)
+
+    conn = get_db()
+    try:
+        with transaction(conn):
+            seen = {job_key(j) for j in list_jobs(conn)}
+            added, unchanged = [], []
+            for job in jobs:
+                if job_key(job) in seen:
+                    unchanged.append(job)
+                else:
+                    seen.add(job_key(job))
+                    added.append(job)
+            if not args.dry_run:
+                insert_jobs(conn, added)
+    except ScheduleError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        print("Nothing imported.", file=sys.stderr)
+        sys.exit(1)
+
+    for job in added:
+        print(format_change("+", job))
+    for job in unchanged:
+        print(format_change("=", job))
+    verb = "Would add" if args.dry_run else "Added"
+    print(f"{verb} {len(added)} jobs, {len(unchanged)} already present")
+
+
+def cmd_export(args) -> None:
+    """Write all jobs as JSONL (the format `import` reads)."""
+    out = open(args.output, "w") if args.output else sys.stdout
+    with out:
+        for job in list_jobs(get_db(), args.type):
+            entry = {
+                "id": job["id"],
+                "type": job["type"],
+                "text": job["text"],
+                "schedule": job["schedule"],
+                "created": job["created"],
+            }
+            if job["action"] == "exec":
+                entry["exec"] = job["command"]
+                entry["timeout"] = job["timeout"]
+                entry["max_concurrency"] = job["max_concurrency"]
+                entry["overlap"] = job["overlap"]
+            if job["jitter"] is not None:
+                entry["jitter"] = job["jitter"]
+            if job["catchup"] != "once":
+                entry["catchup"] = job["catchup"]
+            out.write(json.dumps(entry, ensure_ascii=False) + "\n")
 
 
 def cmd_run(args) -> None:
-    """Run a job immediately (for testing)."""
-    data = load_jobs()
-    job = next((j for j in data["jobs"] if j["id"] == args.job_id), None)
+    """Run a job now and record it in the run history."""
+    conn = get_db()
+    job = get_job(conn, args.job_id)
 
     if not job:
         print(f"Job #{args.job_id} not found.", file=sys.stderr)
         return
 
-    subprocess.run(["notify-send", "🦞 Reminder", job["text"]])
-    print(f"Triggered: {job['text']}")
+    scheduled = None
+    if args.scheduled:
+        # at/crontab fire on a minute boundary, then job_command sleeps the
+        # jitter offset; the run was due at that boundary plus the offset
+        delay = int(jitter_offset(job["id"], job.get("jitter")))
+        scheduled = (time.time() - delay) // 60 * 60 + delay
+    run = run_job(job, scheduled)
+    record_runs(conn, [run])
+
+    if job["action"] != "exec":
+        if run[4] != "ok":
+            print(f"Failed to send notification for #{job['id']}: {job['text']}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Triggered: {job['text']}")
+        return
+
+    _, _, started, finished, status, exit_code, output = run
+    print(f"Ran #{job['id']} ({job['text']}): {status}, exit {exit_code}, {finished - started:.2f}s")
+    if output:
+        print(output.rstrip())
+    if status != "ok":
+        sys.exit(1)
+
+
+def cmd_history(args) -> None:
+    """Show run history with duration and start-latency percentiles."""
+    conn = get_db()
+    query = "SELECT * FROM runs"
+    params = []
+    if args.job_id is not None:
+        query += " WHERE job_id = ?"
+        params.append(args.job_id)
+    runs = [dict(row) for row in conn.execute(query + " ORDER BY id", params)]
+
+    if not runs:
+        print("No runs recorded.")
+        return
+
+    by_job: dict[int, list[dict]] = {}
+    for run in runs:
+        by_job.setdefault(run["job_id"], []).append(run)
+
+    print(f"{'Job':<8}{'Runs':>6}{'Fail':>6}{'Skip':>6}   {'duration p50/p95/p99':<24}latency p50/p95")
+    for job_id, job_runs in sorted(by_job.items()):
+        executed = [r for r in job_runs if r["status"] not in ("skipped", "missed")]
+        failed = sum(r["status"] in ("failed", "timeout", "killed") for r in executed)
+        durations = sorted(r["finished"] - r["started"] for r in executed)
+        latencies = sorted(r["started"] - r["scheduled"] for r in executed if r["scheduled"] is not None)
+
+        duration = "/".join(f"{percentile(durations, p):.2f}" for p in (50, 95, 99)) + "s" if durations else "-"
+        latency = "/".join(f"{percentile(latencies, p):.2f}" for p in (50, 95)) + "s" if latencies else "-"
+        print(
+            f"{'#' + str(job_id):<8}{len(job_runs):>6}{failed:>6}{len(job_runs) - len(executed):>6}"
+            f"   {duration:<24}{latency}"
+        )
+
+    if args.job_id is None:
+        return
+
+    print(f"\nLast {min(args.limit, len(runs))} runs:")
+    for run in runs[-args.limit:]:
+        when = datetime.fromtimestamp(run["started"]).strftime("%Y-%m-%d %H:%M:%S")
+        code = "" if run["exit_code"] is None else f" exit {run['exit_code']}"
+        print(f"  {when}  {run['status']}{code}  {run['finished'] - run['started']:.2f}s")
+        if run["output"] and args.output:
+            for line in run["output"].rstrip().splitlines()[-5:]:
+                print(f"      {line}")
+
+
+def cmd_daemon(args) -> None:
+    """Run the scheduler daemon in the foreground."""
+    if is_daemon_running():
+        print("Scheduler daemon already running")
+        return
+    asyncio.run(run_scheduler(
+        max_workers=args.max_workers,
+        spread=args.spread,
+        coalesce=args.coalesce,
+    ))
+
+
+def cmd_status(args) -> None:
+    """Show scheduler status."""
+    conn = get_db()
+    counts = conn.execute(
+        "SELECT backend, type, COUNT(*) AS n FROM jobs GROUP BY backend, type ORDER BY backend, type"
+    ).fetchall()
+
+    if is_daemon_running():
+        print(f"Scheduler: daemon (PID: {load_daemon_state()['pid']})")
+    else:
+        print("Scheduler: at/crontab (daemon not running)")
+
+    if not counts:
+        print("Jobs: none")
+        return
+    print("Jobs:")
+    for row in counts:
+        print(f"  {row['backend']}/{row['type']}: {row['n']}")
 
 
 def main():
@@ -167,22 +1485,87 @@ def main():
     add_parser.add_argument("text", help="Reminder text")
     add_parser.add_argument("--at", help="One-time schedule (e.g., '9:00 tomorrow')")
     add_parser.add_argument("--cron", help="Cron expression (e.g., '0 9 * * *')")
+    add_parser.add_argument("--exec", dest="command", help="Shell command to run instead of notifying")
+    add_parser.add_argument("--timeout", type=float, help="Kill the command after this many seconds")
+    add_parser.add_argument(
+        "--max-concurrency", type=int, default=1,
+        help="Runs of this job allowed at once (daemon only, default: 1)",
+    )
+    add_parser.add_argument(
+        "--overlap", choices=OVERLAP_POLICIES, default="skip",
+        help="When max concurrency is reached: skip the new run, queue it, or kill the running one",
+    )
+    add_parser.add_argument(
+        "--jitter", type=float, metavar="SECONDS",
+        help="Start up to this many seconds late, at a fixed per-job offset",
+    )
+    add_parser.add_argument(
+        "--catchup", choices=CATCHUP_POLICIES, default="once",
+        help="Runs missed while the daemon was down: fire once, fire all, or skip (default: once)",
+    )
     add_parser.set_defaults(func=cmd_add)
 
     # list
     list_parser = subparsers.add_parser("list", help="List all jobs")
+    list_parser.add_argument("--type", choices=["at", "cron"], help="Only list jobs of this type")
+    list_parser.add_argument("--upcoming", metavar="WINDOW", help="Only jobs firing within WINDOW (e.g. 1h, 24h, 7d)")
     list_parser.set_defaults(func=cmd_list)
 
     # remove
-    rm_parser = subparsers.add_parser("remove", help="Remove a job")
-    rm_parser.add_argument("job_id", type=int, help="Job ID to remove")
+    rm_parser = subparsers.add_parser("remove", help="Remove jobs")
+    rm_parser.add_argument("job_id", type=int, nargs="?", help="Job ID to remove")
+    rm_parser.add_argument("--match", help="Remove jobs whose text contains this (case-insensitive)")
+    rm_parser.add_argument("--all", action="store_true", help="Remove all jobs")
+    rm_parser.add_argument("--type", choices=["at", "cron"], help="Only remove jobs of this type")
+    rm_parser.add_argument("--dry-run", action="store_true", help="Show what would be removed")
     rm_parser.set_defaults(func=cmd_remove)
 
     # run
     run_parser = subparsers.add_parser("run", help="Run a job immediately")
     run_parser.add_argument("job_id", type=int, help="Job ID to run")
+    run_parser.add_argument("--scheduled", action="store_true", help=argparse.SUPPRESS)  # set by at/crontab
     run_parser.set_defaults(func=cmd_run)
 
+    # history
+    history_parser = subparsers.add_parser("history", help="Show run history and latency percentiles")
+    history_parser.add_argument("job_id", type=int, nargs="?", help="Only this job (also lists its runs)")
+    history_parser.add_argument("--limit", type=int, default=20, help="Runs to list (default: 20)")
+    history_parser.add_argument("--output", action="store_true", help="Show the output tail of each run")
+    history_parser.set_defaults(func=cmd_history)
+
+    # import
+    import_parser = subparsers.add_parser("import", help="Add jobs from a JSONL file")
+    import_parser.add_argument("file", help="JSONL file ('-' for stdin)")
+    import_parser.add_argument("--dry-run", action="store_true", help="Show what would be added")
+    import_parser.set_defaults(func=cmd_import)
+
+    # export
+    export_parser = subparsers.add_parser("export", help="Write jobs as JSONL")
+    export_parser.add_argument("--output", "-o", help="Output file (default: stdout)")
+    export_parser.add_argument("--type", choices=["at", "cron"], help="Only export jobs of this type")
+    export_parser.set_defaults(func=cmd_export)
+
+    # daemon
+    daemon_parser = subparsers.add_parser("daemon", help="Run the built-in scheduler (foreground)")
+    daemon_parser.add_argument(
+        "--max-workers", type=int, default=DEFAULT_MAX_WORKERS,
+        help=f"Jobs run at once across all jobs (default: {DEFAULT_MAX_WORKERS})",
+    )
+    daemon_parser.add_argument(
+        "--spread", type=float, default=0.0, metavar="SECONDS",
+        help="Jitter window for recurring jobs without their own --jitter (default: 0)",
+    )
+    daemon_parser.add_argument(
+        "--coalesce", type=float, default=DEFAULT_COALESCE, metavar="SECONDS",
+        help=f"Merge reminders due this close together into one notification "
+             f"(default: {DEFAULT_COALESCE:g}, 0 to disable)",
+    )
+    daemon_parser.set_defaults(func=cmd_daemon)
+
+    # status
+    status_parser = subparsers.add_parser("status", help="Show scheduler status")
+    status_parser.set_defaults(func=cmd_status)
+
     args = parser.parse_args()
     args.func(args)
 
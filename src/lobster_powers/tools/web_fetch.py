@@ -6,14 +6,28 @@ Examples:
     lp-web-fetch https://example.com
     lp-web-fetch https://example.com --text
     lp-web-fetch https://example.com --max-chars 5000
+    lp-web-fetch https://example.com/huge.log --max-bytes 1000000
+    lp-web-fetch --batch urls.txt --concurrency 16
+    lp-web-fetch https://example.com --cache refresh
+
+Library use: web_fetch() for one URL, or the async fetch_many() to fetch
+many over one pooled connection set, results in completion order.
 """
 
 import argparse
+import asyncio
+import hashlib
 import ipaddress
 import json
 import os
 import socket
+import sqlite3
 import sys
+import tempfile
+import time
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from pathlib import Path
 from urllib.parse import urlparse
 
 import httpx
@@ -27,40 +41,541 @@ DEFAULT_USER_AGENT = (
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_7_2) "
     "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
 )
+DEFAULT_HEADERS = {
+    "User-Agent": DEFAULT_USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+# HTTP cache
+DATA_DIR = Path.home() / ".local" / "share" / "lobster-powers" / "web-fetch"
+CACHE_DB = DATA_DIR / "cache.db"
+HTTP_CACHE_DIR = DATA_DIR / "http"  # response bodies, one file per URL
+HTTP_CACHE_MB = 200  # least recently used responses are evicted past this
+CACHE_MODES = ("use", "refresh", "bypass")
+HEURISTIC_MAX = 86400  # cap on freshness guessed from Last-Modified, seconds
+# Not stored: connection-level, and the body is kept decoded
+UNCACHED_HEADERS = {
+    "connection", "keep-alive", "transfer-encoding", "content-encoding",
+    "content-length", "set-cookie", "age",
+}
+
+# Extraction cache: readability output by content hash, whatever the URL
+EXTRACTOR_VERSION = 1  # bump when extract_readable's output changes
+EXTRACT_CACHE_MB = 100
+
+# Streamed downloads
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024  # never read more of a body than this
+HTML_BYTES_PER_CHAR = 20  # generous: article text is usually well under 10% of the HTML
+TEXT_TYPES = ("application/json", "application/xml", "application/xhtml+xml", "application/javascript")
+BINARY_MAGIC = (b"%PDF", b"PK\x03\x04", b"\x89PNG", b"GIF8", b"\xff\xd8\xff", b"\x1f\x8b")
+# Describe the encoded body, not the decoded bytes we keep
+STREAM_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+# SSRF guard: every hop is resolved once, vetted, and connected to by IP
+RESOLVE_TTL = 60  # seconds a vetted lookup is reused
+MAX_REDIRECTS = 10
+resolved_hosts: dict[str, tuple[float, list[str]]] = {}  # host -> (expires_at, addresses)
+pending_lookups: dict[str, asyncio.Future] = {}  # host -> getaddrinfo in flight
+
+# Batch fetching
+DEFAULT_CONCURRENCY = 8  # requests in flight, and pooled connections
+DEFAULT_PER_HOST = 2  # of those, requests to one host
+
+
+class PrivateAddressError(ValueError):
+    """A host resolves to an address that isn't publicly routable."""
+
+
+def is_public_ip(address: str) -> bool:
+    """Whether an address is globally routable: not private, loopback,
+    link-local, reserved, multicast or unspecified. IPv4 addresses embedded
+    in IPv6 (mapped, 6to4) are checked too."""
+    ip = ipaddress.ip_address(address.split("%")[0])  # drop an IPv6 zone id
+    if getattr(ip, "ipv4_mapped", None):
+        ip = ip.ipv4_mapped
+    addresses = [ip]
+    if getattr(ip, "sixtofour", None):
+        addresses.append(ip.sixtofour)
+    return all(a.is_global and not a.is_multicast for a in addresses)
+
+
+async def resolve_host(host: str) -> list[str]:
+    """Resolve host to its A and AAAA addresses, all of which must be public.
+
+    Lookups run on the event loop's resolver thread, are shared by
+    concurrent callers and reused for RESOLVE_TTL seconds, so a batch
+    resolves each host once. Raises PrivateAddressError for a private
+    address, ValueError if the host doesn't resolve.
+    """
+    try:
+        addresses = [str(ipaddress.ip_address(host))]
+    except ValueError:
+        cached = resolved_hosts.get(host)
+        if cached and cached[0] > time.time():
+            return cached[1]
+
+        loop = asyncio.get_running_loop()
+        lookup = pending_lookups.get(host)
+        if lookup is None or lookup.get_loop() is not loop:
+            lookup = pending_lookups[host] = asyncio.ensure_future(
+                loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+            )
+            lookup.add_done_callback(lambda _: pending_lookups.pop(host, None))
+        try:
+            infos = await asyncio.shield(lookup)
+        except socket.gaierror:
+            raise ValueError(f"Cannot resolve host: {host}")
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+
+    # One private answer is enough to refuse: rebinding setups mix them in
+    if not all(is_public_ip(a) for a in addresses):
+        raise PrivateAddressError("URL points to private/internal network")
+    resolved_hosts[host] = (time.time() + RESOLVE_TTL, addresses)
+    return addresses
 
 
 def is_private_url(url: str) -> bool:
-    """Check if URL points to private/internal network."""
-    parsed = urlparse(url)
-    hostname = parsed.hostname
+    """Check if URL points to private/internal network.
+
+    Synchronous form of the resolver check; not for use inside a running
+    event loop (await resolve_host there).
+    """
+    hostname = urlparse(url).hostname
     if not hostname:
         return True
-
-    # Check common internal hostnames
-    if hostname in ("localhost", "127.0.0.1", "::1", "0.0.0.0"):
+    try:
+        asyncio.run(resolve_host(hostname))
+    except PrivateAddressError:
         return True
+    except ValueError:
+        return False  # Can't resolve, let httpx handle it
+    return False
+
+
+async def vet_url(url: httpx.URL | str) -> list[str]:
+    """Reject non-HTTP URLs and hosts on private networks; return the vetted addresses."""
+    url = httpx.URL(url)
+    if url.scheme not in ("http", "https"):
+        raise ValueError("URL must be http or https")
+    if not url.host:
+        raise ValueError("URL has no host")
+    return await resolve_host(url.raw_host.decode("ascii"))
+
+
+def pinned_request(client: httpx.AsyncClient, url: httpx.URL, address: str, headers: dict) -> httpx.Request:
+    """Build a GET for url that connects to address, not to a fresh lookup.
+
+    Host and TLS SNI (and so certificate checks) stay on the hostname.
+    """
+    extensions = {"sni_hostname": url.raw_host.decode("ascii")} if url.scheme == "https" else {}
+    return client.build_request(
+        "GET",
+        url.copy_with(host=address),
+        headers={**headers, "Host": url.netloc.decode("ascii")},
+        extensions=extensions,
+    )
+
 
+async def send_pinned(client: httpx.AsyncClient, url: httpx.URL, headers: dict) -> httpx.Response:
+    """Vet url and stream a GET from the first of its addresses that accepts a connection.
+
+    The client must use PinnedTransport (make_client does).
+    """
+    addresses = await vet_url(url)
+    for address in addresses:
+        try:
+            return await client.send(pinned_request(client, url, address, headers), stream=True)
+        except httpx.ConnectError as e:
+            error = e
+    raise error
+
+
+class PinnedTransport(httpx.AsyncBaseTransport):
+    """One connection pool per Host, for clients sending pinned requests.
+
+    Pinned URLs carry the IP, so a single pool would key connections by
+    IP and hand one host's TLS session, checked against its certificate,
+    to another host on the same address.
+    """
+
+    def __init__(self, **options):
+        self.options = options  # for each httpx.AsyncHTTPTransport
+        self.pools: dict[str, httpx.AsyncHTTPTransport] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = f"{request.url.scheme}://{request.headers.get('host', '')}"
+        pool = self.pools.get(key)
+        if pool is None:
+            pool = self.pools[key] = httpx.AsyncHTTPTransport(**self.options)
+        return await pool.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        for pool in self.pools.values():
+            await pool.aclose()
+        self.pools.clear()
+
+
+def get_cache_db() -> sqlite3.Connection:
+    """Get cache database connection, creating schema if needed."""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(CACHE_DB, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS http_cache (
+            url TEXT PRIMARY KEY,
+            key TEXT NOT NULL,             -- body file name in HTTP_CACHE_DIR
+            final_url TEXT NOT NULL,
+            headers TEXT NOT NULL,         -- JSON list of [name, value]
+            etag TEXT,
+            last_modified TEXT,
+            stored_at REAL NOT NULL,
+            expires_at REAL NOT NULL,      -- fresh until; <= stored_at means revalidate
+            size INTEGER NOT NULL,
+            used_at REAL NOT NULL
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_http_cache_used ON http_cache(used_at);
+
+        CREATE TABLE IF NOT EXISTS extract_cache (
+            hash TEXT NOT NULL,            -- sha256 of the decoded body
+            version INTEGER NOT NULL,      -- EXTRACTOR_VERSION
+            mode TEXT NOT NULL,            -- extractor
+            result TEXT NOT NULL,          -- JSON: title, markdown, text
+            size INTEGER NOT NULL,
+            used_at REAL NOT NULL,
+            PRIMARY KEY (hash, version, mode)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_extract_cache_used ON extract_cache(used_at);
+    """)
+    return conn
+
+
+def with_cache_db(func, *args):
+    """Call func(conn, *args) on a fresh cache connection; run via asyncio.to_thread."""
+    conn = get_cache_db()
     try:
-        # Resolve hostname and check IP
-        ip = socket.gethostbyname(hostname)
-        ip_obj = ipaddress.ip_address(ip)
-        return ip_obj.is_private or ip_obj.is_loopback or ip_obj.is_link_local
-    except socket.gaierror:
-        return False  # Can't resolve, let httpx handle it
+        return func(conn, *args)
+    finally:
+        conn.close()
 
 
-def fetch_url(url: str, timeout: int = DEFAULT_TIMEOUT) -> httpx.Response:
-    """Fetch URL with proper headers and redirect handling."""
-    headers = {
-        "User-Agent": DEFAULT_USER_AGENT,
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9",
-    }
-    response = httpx.get(url, headers=headers, follow_redirects=True, timeout=timeout)
+def parse_cache_control(value: str) -> dict:
+    """Parse a Cache-Control header into {directive: value or True}."""
+    directives = {}
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else True
+    return directives
+
+
+def http_date(value: str | None) -> float | None:
+    """Parse an HTTP date header to a timestamp."""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def fresh_until(headers: httpx.Headers, now: float) -> float:
+    """When a response received at `now` stops being fresh (RFC 9111 section 4.2).
+
+    Uses max-age, else Expires - Date, else 10% of the time since
+    Last-Modified (capped at a day). no-cache means revalidate every time.
+    """
+    directives = parse_cache_control(headers.get("cache-control", ""))
+    if "no-cache" in directives:
+        return now
+
+    date = http_date(headers.get("date")) or now
+    try:
+        age = max(int(headers.get("age", 0)), 0)
+    except ValueError:
+        age = 0
+
+    if "max-age" in directives:
+        try:
+            lifetime = int(directives["max-age"])
+        except ValueError:
+            lifetime = 0
+    elif headers.get("expires") is not None:
+        expires = http_date(headers["expires"])
+        lifetime = expires - date if expires else 0  # An invalid Expires means already expired
+    elif last_modified := http_date(headers.get("last-modified")):
+        lifetime = min((date - last_modified) / 10, HEURISTIC_MAX)
+    else:
+        lifetime = 0
+    return now + max(lifetime - age, 0)
+
+
+def cache_lookup(conn: sqlite3.Connection, url: str) -> tuple[sqlite3.Row, bytes] | None:
+    """Return the stored response for url and its body, if any."""
+    row = conn.execute("SELECT * FROM http_cache WHERE url = ?", (url,)).fetchone()
+    if row is None:
+        return None
+    try:
+        body = (HTTP_CACHE_DIR / row["key"]).read_bytes()
+    except FileNotFoundError:
+        conn.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+        return None
+    conn.execute("UPDATE http_cache SET used_at = ? WHERE url = ?", (time.time(), url))
+    return row, body
+
+
+def cache_store(conn: sqlite3.Connection, url: str, response: httpx.Response) -> None:
+    """Store a response if HTTP caching rules allow, then evict past HTTP_CACHE_MB."""
+    directives = parse_cache_control(response.headers.get("cache-control", ""))
+    if response.status_code != 200 or "no-store" in directives:
+        return
+    now = time.time()
+    expires_at = fresh_until(response.headers, now)
+    etag, last_modified = response.headers.get("etag"), response.headers.get("last-modified")
+    if expires_at <= now and not etag and not last_modified:
+        return  # Never fresh and can't be revalidated
+
+    key = hashlib.sha256(url.encode()).hexdigest()
+    HTTP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # A temp name of its own, so concurrent stores of one URL don't collide
+    with tempfile.NamedTemporaryFile(dir=HTTP_CACHE_DIR, prefix=f"{key}.", suffix=".tmp", delete=False) as tmp:
+        try:
+            tmp.write(response.content)
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+    os.replace(tmp.name, HTTP_CACHE_DIR / key)
+
+    headers = [[k, v] for k, v in response.headers.multi_items() if k.lower() not in UNCACHED_HEADERS]
+    conn.execute(
+        "INSERT OR REPLACE INTO http_cache"
+        " (url, key, final_url, headers, etag, last_modified, stored_at, expires_at, size, used_at)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (url, key, str(response.url), json.dumps(headers), etag, last_modified,
+         now, expires_at, len(response.content), now),
+    )
+    evict_http_cache(conn)
+
+
+def cache_revalidated(conn: sqlite3.Connection, row: sqlite3.Row, response: httpx.Response) -> list:
+    """Merge a 304's headers into the stored response and renew its freshness."""
+    headers = {k.lower(): [k, v] for k, v in json.loads(row["headers"])}
+    for k, v in response.headers.multi_items():
+        if k.lower() not in UNCACHED_HEADERS:
+            headers[k.lower()] = [k, v]
+    merged = httpx.Headers([tuple(h) for h in headers.values()])
+    now = time.time()
+    conn.execute(
+        "UPDATE http_cache SET headers = ?, etag = ?, last_modified = ?, stored_at = ?, expires_at = ?"
+        " WHERE url = ?",
+        (json.dumps(list(headers.values())), merged.get("etag"), merged.get("last-modified"),
+         now, fresh_until(merged, now), row["url"]),
+    )
+    return list(headers.values())
+
+
+def evict_http_cache(conn: sqlite3.Connection, max_bytes: int = HTTP_CACHE_MB * 1024 * 1024) -> None:
+    """Delete least recently used responses until the cache fits in max_bytes."""
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+    if total <= max_bytes:
+        return
+    for row in conn.execute("SELECT url, key, size FROM http_cache ORDER BY used_at").fetchall():
+        conn.execute("DELETE FROM http_cache WHERE url = ?", (row["url"],))
+        (HTTP_CACHE_DIR / row["key"]).unlink(missing_ok=True)
+        total -= row["size"]
+        if total <= max_bytes:
+            break
+
+
+def cached_response(final_url: str, headers: list, body: bytes, status: str) -> httpx.Response:
+    """Build a response from the cache; `status` ("hit" or "revalidated") goes in extensions."""
+    return httpx.Response(
+        200,
+        headers=[tuple(h) for h in headers],
+        content=body,
+        request=httpx.Request("GET", final_url),
+        extensions={"lp_cache": status},
+    )
+
+
+def make_client(
+    concurrency: int = DEFAULT_CONCURRENCY,
+    http2: bool = False,
+    timeout: int = DEFAULT_TIMEOUT,
+) -> httpx.AsyncClient:
+    """Create a client whose keep-alive connections are reused across fetches.
+
+    Redirects are not followed here: fetch_streamed follows them itself so
+    every hop goes through the SSRF guard. Connections are pooled per host
+    (PinnedTransport); fetch_many's semaphores bound the total.
+    """
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            raise ValueError("HTTP/2 needs the h2 package: pip install 'httpx[http2]'")
+    return httpx.AsyncClient(
+        headers=DEFAULT_HEADERS,
+        follow_redirects=False,
+        timeout=timeout,
+        transport=PinnedTransport(
+            http2=http2,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        ),
+    )
+
+
+def media_type(content_type: str) -> str:
+    """'text/html; charset=utf-8' -> 'text/html'."""
+    return content_type.split(";")[0].strip().lower()
+
+
+def is_text_type(content_type: str) -> bool:
+    """Whether a Content-Type is something we can extract text from."""
+    mime = media_type(content_type)
+    return mime.startswith("text/") or mime in TEXT_TYPES or mime.endswith(("+json", "+xml"))
+
+
+def byte_budget(content_type: str, max_chars: int | None) -> int | None:
+    """Bytes worth reading to fill max_chars after extraction; None reads to the cap.
+
+    JSON is read whole (a cut document doesn't parse); plain text needs at
+    most 4 bytes (UTF-8) per char; HTML gets HTML_BYTES_PER_CHAR.
+    """
+    mime = media_type(content_type)
+    if max_chars is None or "json" in mime:
+        return None
+    if not mime or "html" in mime:
+        return max_chars * HTML_BYTES_PER_CHAR
+    return (max_chars + 1) * 4
+
+
+async def fetch_streamed(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: dict,
+    max_chars: int | None,
+    max_bytes: int,
+) -> httpx.Response:
+    """GET url, reading only as much of the body as extraction can use.
+
+    Each hop, redirects included, is vetted and pinned (send_pinned).
+    Binary content types are refused from the headers alone, before any
+    of the body is read; without a Content-Type the first chunk is
+    sniffed. The body stops at the type's byte budget or max_bytes,
+    whichever is lower; a cut body sets extensions["lp_partial"].
+    """
+    target = httpx.URL(url)
+    for _ in range(MAX_REDIRECTS + 1):
+        response = await send_pinned(client, target, headers)
+        if not response.has_redirect_location:  # 304 is 3xx too, but no redirect
+            break
+        await response.aclose()
+        target = target.join(response.headers["location"])
+    else:
+        raise ValueError(f"Too many redirects (more than {MAX_REDIRECTS})")
+
+    try:
+        if response.status_code == 304:
+            return response
+        response.raise_for_status()
+        content_type = response.headers.get("content-type", "")
+        if content_type and not is_text_type(content_type):
+            raise ValueError(f"Unsupported content type: {media_type(content_type)}")
+
+        budget = byte_budget(content_type, max_chars)
+        limit = max_bytes if budget is None else min(budget, max_bytes)
+        body = bytearray()
+        partial = False
+        async for chunk in response.aiter_bytes():
+            if not body and not content_type and (b"\x00" in chunk[:1024] or chunk.startswith(BINARY_MAGIC)):
+                raise ValueError("Unsupported content: binary data")
+            body += chunk
+            if len(body) >= limit:
+                # Stop here; whatever is left is never downloaded. Content-Length
+                # counts encoded bytes, so compare it with what came off the wire.
+                complete = response.headers.get("content-length") == str(response.num_bytes_downloaded)
+                partial = len(body) > limit or not complete
+                del body[limit:]
+                break
+    finally:
+        await response.aclose()
+
+    return httpx.Response(
+        response.status_code,
+        headers=[(k, v) for k, v in response.headers.multi_items() if k.lower() not in STREAM_HEADERS],
+        content=bytes(body),
+        request=httpx.Request("GET", target),
+        extensions={"lp_partial": partial},
+    )
+
+
+async def fetch_url_async(
+    client: httpx.AsyncClient,
+    url: str,
+    cache: str = "use",
+    max_chars: int | None = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> httpx.Response:
+    """Fetch URL on a shared client, through the HTTP cache.
+
+    cache="use" answers from a fresh stored response without a request and
+    revalidates a stale one (If-None-Match/If-Modified-Since); "refresh"
+    always revalidates; "bypass" neither reads nor writes the cache. The
+    response's extensions["lp_cache"] says which happened: "hit",
+    "revalidated", "miss" or "bypass".
+
+    Bodies are streamed and cut early (see fetch_streamed); a cut body is
+    never stored.
+    """
+    if cache not in CACHE_MODES:
+        raise ValueError(f"cache must be one of {', '.join(CACHE_MODES)}")
+    if cache == "bypass":
+        response = await fetch_streamed(client, url, {}, max_chars, max_bytes)
+        response.extensions["lp_cache"] = "bypass"
+        return response
+
+    # SQLite and the body files are blocking I/O; keep them off the event loop
+    stored = await asyncio.to_thread(with_cache_db, cache_lookup, url)
+    headers = {}
+    if stored:
+        row, body = stored
+        if cache == "use" and time.time() < row["expires_at"]:
+            return cached_response(row["final_url"], json.loads(row["headers"]), body, "hit")
+        if row["etag"]:
+            headers["If-None-Match"] = row["etag"]
+        if row["last_modified"]:
+            headers["If-Modified-Since"] = row["last_modified"]
+
+    response = await fetch_streamed(client, url, headers, max_chars, max_bytes)
+    if response.status_code == 304 and stored:
+        merged = await asyncio.to_thread(with_cache_db, cache_revalidated, row, response)
+        return cached_response(row["final_url"], merged, body, "revalidated")
     response.raise_for_status()
+    if not response.extensions["lp_partial"]:
+        await asyncio.to_thread(with_cache_db, cache_store, url, response)
+    response.extensions["lp_cache"] = "miss"
     return response
 
 
+def fetch_url(
+    url: str,
+    timeout: int = DEFAULT_TIMEOUT,
+    cache: str = "use",
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> httpx.Response:
+    """Fetch URL with proper headers and redirect handling."""
+    async def run() -> httpx.Response:
+        async with make_client(timeout=timeout) as client:
+            return await fetch_url_async(client, url, cache, max_bytes=max_bytes)
+
+    return asyncio.run(run())
+
+
 def extract_readable(html: str, url: str) -> dict:
     """Extract readable content using Readability."""
     doc = Document(html)
@@ -81,9 +596,62 @@ def extract_readable(html: str, url: str) -> dict:
     }
 
 
-def fetch_firecrawl(url: str, api_key: str) -> dict:
-    """Fetch using Firecrawl API (for JS-heavy pages)."""
-    response = httpx.post(
+def cached_extract(html: str, url: str, cache: str = "use") -> tuple[dict, bool]:
+    """Run extract_readable through the extraction cache; return (result, was_cached).
+
+    Keyed by the body's hash, so identical pages under different URLs
+    (mirrors, tracking parameters) share one entry. cache="bypass" skips it.
+    """
+    if cache == "bypass":
+        return extract_readable(html, url), False
+
+    digest = hashlib.sha256(html.encode("utf-8", "surrogatepass")).hexdigest()
+    key = (digest, EXTRACTOR_VERSION, "readability")
+    conn = get_cache_db()
+    try:
+        row = conn.execute(
+            "SELECT result FROM extract_cache WHERE hash = ? AND version = ? AND mode = ?", key
+        ).fetchone()
+        if row:
+            conn.execute(
+                "UPDATE extract_cache SET used_at = ? WHERE hash = ? AND version = ? AND mode = ?",
+                (time.time(), *key),
+            )
+            return json.loads(row["result"]), True
+
+        result = extract_readable(html, url)
+        data = json.dumps(result)
+        conn.execute(
+            "INSERT OR REPLACE INTO extract_cache (hash, version, mode, result, size, used_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (*key, data, len(data), time.time()),
+        )
+        evict_extract_cache(conn)
+        return result, False
+    finally:
+        conn.close()
+
+
+def evict_extract_cache(conn: sqlite3.Connection, max_bytes: int = EXTRACT_CACHE_MB * 1024 * 1024) -> None:
+    """Drop results of other extractor versions, then least recently used ones past max_bytes."""
+    conn.execute("DELETE FROM extract_cache WHERE version != ?", (EXTRACTOR_VERSION,))
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM extract_cache").fetchone()[0]
+    if total <= max_bytes:
+        return
+    for row in conn.execute("SELECT rowid, size FROM extract_cache ORDER BY used_at").fetchall():
+        conn.execute("DELETE FROM extract_cache WHERE rowid = ?", (row["rowid"],))
+        total -= row["size"]
+        if total <= max_bytes:
+            break
+
+
+async def fetch_firecrawl_async(url: str, api_key: str, client: httpx.AsyncClient | None = None) -> dict:
+    """Fetch using Firecrawl API (for JS-heavy pages), on `client` if given."""
+    if client is None:
+        async with make_client() as client:
+            return await fetch_firecrawl_async(url, api_key, client)
+
+    response = await client.post(
         "https://api.firecrawl.dev/v1/scrape",
         headers={"Authorization": f"Bearer {api_key}"},
         json={"url": url, "formats": ["markdown"]},
@@ -101,6 +669,11 @@ def fetch_firecrawl(url: str, api_key: str) -> dict:
     }
 
 
+def fetch_firecrawl(url: str, api_key: str) -> dict:
+    """Fetch using Firecrawl API (for JS-heavy pages)."""
+    return asyncio.run(fetch_firecrawl_async(url, api_key))
+
+
 def truncate(text: str, max_chars: int) -> tuple[str, bool]:
     """Truncate text to max_chars, return (text, was_truncated)."""
     if len(text) <= max_chars:
@@ -108,77 +681,37 @@ def truncate(text: str, max_chars: int) -> tuple[str, bool]:
     return text[:max_chars] + "\n\n[truncated]", True
 
 
-def web_fetch(
-    url: str,
-    extract_mode: str = "markdown",
-    max_chars: int = DEFAULT_MAX_CHARS,
-    use_firecrawl: bool = False,
-) -> dict:
-    """Fetch URL and extract content."""
-    # Validate URL
-    parsed = urlparse(url)
-    if parsed.scheme not in ("http", "https"):
-        raise ValueError("URL must be http or https")
-
-    # SSRF protection: block private/internal networks
-    if is_private_url(url):
-        raise ValueError("URL points to private/internal network")
-
-    firecrawl_key = os.environ.get("FIRECRAWL_API_KEY")
+def firecrawl_result(result: dict, extract_mode: str, max_chars: int) -> dict:
+    """Shape a Firecrawl response like the other extractors' results."""
+    content = result["markdown"]
+    if extract_mode == "text":
+        h = html2text.HTML2Text()
+        h.ignore_links = True
+        h.ignore_images = True
+        content = h.handle(content)
+    content, truncated = truncate(content, max_chars)
+    return {
+        "title": result.get("title"),
+        "content": content,
+        "extractor": "firecrawl",
+        "truncated": truncated,
+    }
 
-    # Try Firecrawl first if requested
-    if use_firecrawl and firecrawl_key:
-        try:
-            result = fetch_firecrawl(url, firecrawl_key)
-            content = result["markdown"]
-            if extract_mode == "text":
-                h = html2text.HTML2Text()
-                h.ignore_links = True
-                h.ignore_images = True
-                content = h.handle(content)
-            content, truncated = truncate(content, max_chars)
-            return {
-                "url": url,
-                "title": result.get("title"),
-                "content": content,
-                "extractor": "firecrawl",
-                "truncated": truncated,
-            }
-        except Exception as e:
-            if not use_firecrawl:
-                pass  # Fall through to regular fetch
-            else:
-                raise
 
-    # Regular fetch
-    response = fetch_url(url)
+def extract_response(
+    url: str,
+    response: httpx.Response,
+    extract_mode: str,
+    max_chars: int,
+    cache: str = "use",
+) -> dict:
+    """Extract content from a fetched response by its content type."""
     content_type = response.headers.get("content-type", "")
     final_url = str(response.url)
 
     if "text/html" in content_type:
-        extracted = extract_readable(response.text, final_url)
+        extracted, was_cached = cached_extract(response.text, final_url, cache)
         content = extracted["markdown"] if extract_mode == "markdown" else extracted["text"]
-
-        # If Readability failed, try Firecrawl as fallback
-        if not content.strip() and firecrawl_key:
-            try:
-                result = fetch_firecrawl(url, firecrawl_key)
-                content = result["markdown"]
-                if extract_mode == "text":
-                    h = html2text.HTML2Text()
-                    content = h.handle(content)
-                content, truncated = truncate(content, max_chars)
-                return {
-                    "url": url,
-                    "final_url": final_url,
-                    "title": result.get("title") or extracted["title"],
-                    "content": content,
-                    "extractor": "firecrawl",
-                    "truncated": truncated,
-                }
-            except Exception:
-                pass  # Return empty content
-
         content, truncated = truncate(content, max_chars)
         return {
             "url": url,
@@ -186,6 +719,7 @@ def web_fetch(
             "title": extracted["title"],
             "content": content,
             "extractor": "readability",
+            "extract_cache": "hit" if was_cached else "miss",
             "truncated": truncated,
         }
 
@@ -215,13 +749,145 @@ def web_fetch(
     }
 
 
+async def web_fetch_async(
+    url: str,
+    extract_mode: str = "markdown",
+    max_chars: int = DEFAULT_MAX_CHARS,
+    use_firecrawl: bool = False,
+    client: httpx.AsyncClient | None = None,
+    cache: str = "use",
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> dict:
+    """Fetch URL and extract content, on `client` if given.
+
+    `cache` is the HTTP cache mode (see fetch_url_async). At most
+    `max_bytes` of the body are read, and less when that is enough for
+    `max_chars`; a result from a cut body has "partial": true.
+    """
+    if client is None:
+        async with make_client() as client:
+            return await web_fetch_async(url, extract_mode, max_chars, use_firecrawl, client, cache, max_bytes)
+
+    await vet_url(url)  # Fail fast; every hop is checked again from the resolver cache
+    firecrawl_key = os.environ.get("FIRECRAWL_API_KEY")
+
+    # Try Firecrawl first if requested
+    if use_firecrawl and firecrawl_key:
+        result = await fetch_firecrawl_async(url, firecrawl_key, client)
+        return {"url": url, **firecrawl_result(result, extract_mode, max_chars)}
+
+    # Regular fetch; extraction is CPU-bound, so off the event loop
+    response = await fetch_url_async(client, url, cache, max_chars, max_bytes)
+    result = await asyncio.to_thread(extract_response, url, response, extract_mode, max_chars, cache)
+    result["cache"] = response.extensions.get("lp_cache")
+    if response.extensions.get("lp_partial"):
+        result["partial"] = result["truncated"] = True
+
+    # If Readability failed, try Firecrawl as fallback
+    if result["extractor"] == "readability" and not result["content"].strip() and firecrawl_key:
+        try:
+            fallback = firecrawl_result(await fetch_firecrawl_async(url, firecrawl_key, client), extract_mode, max_chars)
+            fallback["title"] = fallback["title"] or result["title"]
+            return {"url": url, "final_url": result["final_url"], **fallback}
+        except Exception:
+            pass  # Return empty content
+
+    return result
+
+
+def web_fetch(
+    url: str,
+    extract_mode: str = "markdown",
+    max_chars: int = DEFAULT_MAX_CHARS,
+    use_firecrawl: bool = False,
+    cache: str = "use",
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> dict:
+    """Fetch URL and extract content."""
+    return asyncio.run(web_fetch_async(url, extract_mode, max_chars, use_firecrawl, cache=cache, max_bytes=max_bytes))
+
+
+async def fetch_many(
+    urls: list[str],
+    extract_mode: str = "markdown",
+    max_chars: int = DEFAULT_MAX_CHARS,
+    use_firecrawl: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    per_host: int = DEFAULT_PER_HOST,
+    http2: bool = False,
+    client: httpx.AsyncClient | None = None,
+    cache: str = "use",
+    max_bytes: int = DEFAULT_MAX_BYTES,
+):
+    """Fetch many URLs over one pooled client, yielding results as they complete.
+
+    At most `concurrency` requests are in flight, `per_host` of them to
+    any one host. Each result carries its `index` in `urls`; a URL that
+    fails yields {"index", "url", "error"} instead of raising.
+    """
+    if concurrency < 1 or per_host < 1:
+        raise ValueError("concurrency and per_host must be at least 1")
+    own_client = client is None
+    if own_client:
+        client = make_client(concurrency=concurrency, http2=http2)
+    slots = asyncio.Semaphore(concurrency)
+    hosts = defaultdict(lambda: asyncio.Semaphore(per_host))
+
+    async def fetch_one(index: int, url: str) -> dict:
+        started = time.perf_counter()
+        try:
+            # Host slot first, so a busy host doesn't hold global slots idle
+            async with hosts[urlparse(url).hostname or ""], slots:
+                result = {"index": index, **await web_fetch_async(
+                    url, extract_mode, max_chars, use_firecrawl, client, cache, max_bytes)}
+        except httpx.HTTPStatusError as e:
+            result = {"index": index, "url": url, "error": f"HTTP {e.response.status_code}",
+                      "http_status": e.response.status_code}
+        except Exception as e:
+            result = {"index": index, "url": url, "error": str(e) or type(e).__name__}
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    tasks = [asyncio.create_task(fetch_one(i, url)) for i, url in enumerate(urls)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        if own_client:
+            await client.aclose()
+
+
+def run_batch(args, urls: list[str]) -> int:
+    """Fetch URLs concurrently, printing one JSON line per result; return the failure count."""
+    async def run() -> int:
+        failed = 0
+        async for result in fetch_many(
+            urls,
+            extract_mode="text" if args.text else "markdown",
+            max_chars=args.max_chars,
+            use_firecrawl=args.firecrawl,
+            concurrency=args.concurrency,
+            per_host=args.per_host,
+            http2=args.http2,
+            cache=args.cache,
+            max_bytes=args.max_bytes,
+        ):
+            failed += "error" in result
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+        return failed
+
+    return asyncio.run(run())
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Fetch and extract readable content from URLs",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog=__doc__,
     )
-    parser.add_argument("url", help="URL to fetch")
+    parser.add_argument("url", nargs="?", help="URL to fetch")
     parser.add_argument(
         "--text", "-t",
         action="store_true",
@@ -233,6 +899,12 @@ def main():
         default=DEFAULT_MAX_CHARS,
         help=f"Maximum characters (default: {DEFAULT_MAX_CHARS})"
     )
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        default=DEFAULT_MAX_BYTES,
+        help=f"Read at most this much of a response body (default: {DEFAULT_MAX_BYTES})"
+    )
     parser.add_argument(
         "--firecrawl",
         action="store_true",
@@ -243,8 +915,59 @@ def main():
         action="store_true",
         help="Output as JSON"
     )
+    parser.add_argument(
+        "--cache",
+        choices=CACHE_MODES,
+        default="use",
+        help="HTTP cache: use fresh copies and revalidate stale ones (default), "
+             "refresh (always revalidate), or bypass"
+    )
+    parser.add_argument(
+        "--batch", "-b",
+        metavar="FILE",
+        help="Fetch every URL in FILE ('-' for stdin), one JSON line per result"
+    )
+    parser.add_argument(
+        "--concurrency", "-c",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Requests in flight with --batch (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=DEFAULT_PER_HOST,
+        help=f"Requests in flight to one host with --batch (default: {DEFAULT_PER_HOST})"
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="Use HTTP/2 where servers support it (needs h2)"
+    )
 
     args = parser.parse_args()
+    if bool(args.url) == bool(args.batch):
+        parser.error("give a URL or --batch FILE")
+    if args.concurrency < 1 or args.per_host < 1:
+        parser.error("--concurrency and --per-host must be at least 1")
+
+    if args.batch:
+        try:
+            source = sys.stdin if args.batch == "-" else open(args.batch)
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        with source:
+            urls = [line.strip() for line in source if line.strip() and not line.startswith("#")]
+        started = time.perf_counter()
+        try:
+            failed = run_batch(args, urls)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        elapsed = time.perf_counter() - started
+        print(f"{len(urls)} URLs, {failed} failed, {elapsed:.1f} s", file=sys.stderr)
+        sys.exit(1 if failed else 0)
 
     try:
         result = web_fetch(
@@ -252,6 +975,8 @@ def main():
             extract_mode="text" if args.text else "markdown",
             max_chars=args.max_chars,
             use_firecrawl=args.firecrawl,
+            cache=args.cache,
+            max_bytes=args.max_bytes,
         )
 
         if args.json:
@@ -260,7 +985,9 @@ def main():
             if result.get("title"):
                 print(f"# {result['title']}\n")
             print(result["content"])
-            if result.get("truncated"):
+            if result.get("partial"):
+                print("\n[Stopped reading the response early; content is incomplete]", file=sys.stderr)
+            elif result.get("truncated"):
                 print(f"\n[Content truncated at {args.max_chars} chars]", file=sys.stderr)
 
     except httpx.HTTPStatusError as e: